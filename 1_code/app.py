@@ -1,21 +1,31 @@
 # Written by Colby
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, g
 from db_interface import DatabaseInterface
 from mock_db import MockDatabase
 from mongodb import MongoDatabase
-from util import to_minutes
+from sqlite_db import SQLiteDatabase
+from catalog_cache import CatalogCache
+from metrics import registry, InstrumentedDatabase, start_request, finish_request, record_request, server_timing_header
+from util import format_time_range
 from datetime import datetime
+import time
 import os
 
 app = Flask(__name__)
 
 # Select database based on environment variable
 DB_TYPE = os.getenv("DB_TYPE", "mock")  # Default to 'mock'
+# Seconds before cached building/room lists are reloaded, to pick up semester loads made by other processes
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300")) or None  # 0 disables the ttl
+# Add a Server-Timing header breaking each response's time down into database calls and the rest of the app
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
 
 def get_db() -> DatabaseInterface:
     if DB_TYPE.lower() == "mongo":
         return MongoDatabase()
+    elif DB_TYPE.lower() == "sqlite":
+        return SQLiteDatabase()
     else:
         return MockDatabase()
 
@@ -26,14 +36,41 @@ try:
 except Exception as e:
     print(f"Database initialization failed: {e}")
     raise
-    
+
+# Time every database call for /metrics and Server-Timing
+db = InstrumentedDatabase(db)
+
+# Building and room lists only change when rooms are created or a semester is loaded
+catalog = CatalogCache(db, ttl=CATALOG_CACHE_TTL)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    start_request()
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.request_start
+    timings = finish_request()
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    record_request(route, request.method, response.status_code, elapsed, response.calculate_content_length(), timings)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+# Prometheus metrics
+@app.route('/metrics')
+def get_metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
 
 # Home page with search form
 @app.route('/')
 def search():
     today = datetime.now().strftime('%Y-%m-%d')
-    buildings = db.get_buildings()
-    building_to_rooms = db.get_rooms_by_building()
+    min_date, max_date = db.get_date_range() or (None, None)
+    buildings = catalog.get_buildings()
+    building_to_rooms = catalog.get_rooms_by_building()
     
     # Get query parameters to pre-fill the form
     building = request.args.get('building', 'Any Building')
@@ -45,6 +82,8 @@ def search():
 
     return render_template('search.html', 
                          today=today, 
+                         min_date=min_date,
+                         max_date=max_date,
                          buildings=buildings, 
                          building_to_rooms=building_to_rooms,
                          selected_building=building,
@@ -73,29 +112,14 @@ def search_results():
         "duration": duration
     }
 
-    # Find rooms with sufficient gaps
+    # Find rooms with sufficient gaps along with their next availability on the specified date
     building = building if building != "Any Building" else None
     room = room if room != "Any Room Number" else None
-    rooms = db.get_rooms_with_sufficient_gap(building, room, date, start_time, end_time, duration, limit=20)
-
-    # Compute next availability for each room on the specified date
-    rooms_with_availability = []
-    for room_item in rooms:
-        next_slot = db.get_next_availability_on_date(
-            room_item['building'],
-            room_item['room'],
-            date,
-            start_time,
-            end_time,
-            duration
-        )
-        room_data = {
-            'building': room_item['building'],
-            'room': room_item['room'],
-            'location': room_item.get('location', None),
-            'next_availability': next_slot if next_slot else "Not available today" # shouldn't happen
-        }
-        rooms_with_availability.append(room_data)
+    rooms = db.get_rooms_with_next_availability(building, room, date, start_time, end_time, duration, limit=20)
+    rooms_with_availability = [
+        dict(room_item, next_availability=format_time_range(room_item['next_availability']))
+        for room_item in rooms
+    ]
 
     return render_template('results.html', rooms=rooms_with_availability, criteria=criteria)
 
@@ -0,0 +1,231 @@
+# Written by Colby
+# Async version of app.py for ASGI servers, e.g. `hypercorn asgi_app:app`
+
+from quart import Quart, Response, render_template, request, jsonify, g
+from async_db_interface import AsyncDatabaseInterface
+from async_db import AsyncDatabaseAdapter
+from async_mongodb import AsyncMongoDatabase
+from mock_db import MockDatabase
+from sqlite_db import SQLiteDatabase
+from catalog_cache import AsyncCatalogCache
+from metrics import registry, InstrumentedDatabase, start_request, finish_request, record_request, server_timing_header
+from util import format_time_range
+from datetime import datetime
+import asyncio
+import time
+import os
+
+app = Quart(__name__)
+
+# Same settings as app.py
+DB_TYPE = os.getenv("DB_TYPE", "mock")
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300")) or None
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+def get_db() -> AsyncDatabaseInterface:
+    if DB_TYPE.lower() == "mongo":
+        return AsyncMongoDatabase()
+    elif DB_TYPE.lower() == "sqlite":
+        return AsyncDatabaseAdapter(SQLiteDatabase(), offload=True)
+    else:
+        return AsyncDatabaseAdapter(MockDatabase())
+
+# Time every database call for /metrics and Server-Timing
+db = InstrumentedDatabase(get_db())
+catalog = AsyncCatalogCache(db, ttl=CATALOG_CACHE_TTL)
+
+# The async MongoDB client belongs to the serving event loop, so connect once it is running
+@app.before_serving
+async def initialize_db():
+    try:
+        await db.initialize_db()
+    except Exception as e:
+        print(f"Database initialization failed: {e}")
+        raise
+
+@app.after_serving
+async def close_db():
+    if hasattr(db, "close"):
+        await db.close()
+
+@app.before_request
+async def start_request_timer():
+    g.request_start = time.perf_counter()
+    start_request()
+
+@app.after_request
+async def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.request_start
+    timings = finish_request()
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    record_request(route, request.method, response.status_code, elapsed, response.content_length, timings)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+# Prometheus metrics
+@app.route('/metrics')
+async def get_metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+# Home page with search form
+@app.route('/')
+async def search():
+    today = datetime.now().strftime('%Y-%m-%d')
+    # The page's reads are independent, so wait for them together
+    date_range, buildings, building_to_rooms = await asyncio.gather(
+        db.get_date_range(), catalog.get_buildings(), catalog.get_rooms_by_building()
+    )
+    min_date, max_date = date_range or (None, None)
+
+    # Get query parameters to pre-fill the form
+    building = request.args.get('building', 'Any Building')
+    room = request.args.get('room', 'Any Room Number')
+    date = request.args.get('date', today)
+    start_time = request.args.get('start_time', '')
+    end_time = request.args.get('end_time', '')
+    duration = request.args.get('duration', '')
+
+    return await render_template('search.html',
+                         today=today,
+                         min_date=min_date,
+                         max_date=max_date,
+                         buildings=buildings,
+                         building_to_rooms=building_to_rooms,
+                         selected_building=building,
+                         selected_room=room,
+                         selected_date=date,
+                         selected_start_time=start_time,
+                         selected_end_time=end_time,
+                         selected_duration=duration)
+
+# Search results page
+@app.route('/results', methods=['POST'])
+async def search_results():
+    form = await request.form
+    building = form.get('building')
+    room = form.get('room')
+    date = form.get('date')
+    start_time = form.get('start_time') or "00:00"
+    end_time = form.get('end_time') or "23:59"
+    duration = form.get('duration')
+
+    criteria = {
+        "building": building,
+        "room": room,
+        "date": date,
+        "start_time": start_time,
+        "end_time": end_time,
+        "duration": duration
+    }
+
+    # One streamed search returns every room with its next availability, so there are no per-room lookups to wait on
+    building = building if building != "Any Building" else None
+    room = room if room != "Any Room Number" else None
+    rooms = await db.get_rooms_with_next_availability(building, room, date, start_time, end_time, duration, limit=20)
+    rooms_with_availability = [
+        dict(room_item, next_availability=format_time_range(room_item['next_availability']))
+        for room_item in rooms
+    ]
+
+    return await render_template('results.html', rooms=rooms_with_availability, criteria=criteria)
+
+# Campus Map page
+@app.route('/map')
+async def map():
+    return await render_template('map.html')
+
+# Get room schedule
+@app.route('/api/schedule/<building>/<room>')
+async def get_schedule(building, room):
+    room_data = await db.get_room(building, room)
+    if room_data:
+        return jsonify(room_data['schedule'])
+    return jsonify({"error": "Room not found"}), 404
+
+# Schedule page
+@app.route('/schedule/<building>/<room>')
+async def schedule(building, room):
+    date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+    # Ensure search_criteria is always provided
+    search_criteria = {
+        'building': request.args.get('building_search', building),
+        'room': request.args.get('room_search', room),
+        'date': date,
+        'start_time': request.args.get('start_time', ''),
+        'end_time': request.args.get('end_time', ''),
+        'duration': request.args.get('duration', '')
+    }
+    return await render_template('schedule.html',
+                         building=building,
+                         room=room,
+                         today=date,
+                         search_criteria=search_criteria)
+
+# Report event error
+@app.route('/api/report', methods=['POST'])
+async def report_error():
+    form = await request.form
+    room = form.get('room')
+    building = form.get('building')
+    date = form.get('date', datetime.now().strftime('%Y-%m-%d'))
+    start_time = form.get('start_time')
+    end_time = form.get('end_time')
+    report_type = form.get('report_type')
+    event_title = form.get('event_title', '')
+    notes = form.get('notes', '')
+
+    if report_type == "add":
+        result = await db.add_event(building, room, date, start_time, end_time, event_title, notes=notes)
+        if result is not True:
+            return jsonify({"error": result}), 400  # Return validation error
+        return jsonify({
+            "status": "Event added",
+            "building": building,
+            "room": room,
+            "start_time": start_time,
+            "end_time": end_time,
+            "event_title": event_title,
+            "notes": notes
+            })
+
+    elif report_type == "remove":
+        success = await db.remove_user_event(building, room, date, start_time, end_time)
+        if not success:
+            return jsonify({"error": "Room or event not found"}), 404
+        return jsonify({
+            "status": "Event removed",
+            "building": building,
+            "room": room,
+            "start_time": start_time,
+            "end_time": end_time
+            })
+
+    elif report_type == "cancel":
+        success = await db.cancel_event(building, room, date, start_time, end_time, notes=notes)
+        if not success:
+            return jsonify({"error": "Room or event not found"}), 404
+        return jsonify({
+            "status": "Event marked as cancelled",
+            "building": building,
+            "room": room,
+            "start_time": start_time,
+            "end_time": end_time,
+            "notes": notes
+            })
+
+    elif report_type == "confirm":
+        success = await db.uncancel_event(building, room, date, start_time, end_time, notes=notes)
+        if not success:
+            return jsonify({"error": "Room or event not found"}), 404
+        return jsonify({
+            "status": "Event marked as scheduled",
+            "building": building,
+            "room": room,
+            "start_time": start_time,
+            "end_time": end_time,
+            "notes": notes
+            })
+
+    return jsonify({"error": "Invalid report type"}), 400
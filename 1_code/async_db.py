@@ -0,0 +1,62 @@
+# Written by Colby
+# Async access to the synchronous DatabaseInterface backends
+
+import asyncio
+from async_db_interface import AsyncDatabaseInterface
+from db_interface import DatabaseInterface
+
+class AsyncDatabaseAdapter(AsyncDatabaseInterface):
+    """
+    Runs a DatabaseInterface's methods as coroutines. With offload=True each call runs in a worker thread
+    (asyncio.to_thread), for backends that block on I/O; otherwise calls run on the event loop, which is
+    faster for the in-memory database since its methods never wait.
+    The wrapped database is still available as .sync, e.g. for scripts and tests.
+    """
+    def __init__(self, db: DatabaseInterface, offload=False):
+        self.sync = db
+        self.offload = offload
+
+    @property
+    def catalog_generation(self):
+        return self.sync.catalog_generation
+
+    async def _call(self, method, *args, **kwargs):
+        if self.offload:
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    async def initialize_db(self):
+        return await self._call(self.sync.initialize_db)
+
+    async def get_room(self, building, room):
+        return await self._call(self.sync.get_room, building, room)
+
+    async def get_date_range(self):
+        return await self._call(self.sync.get_date_range)
+
+    async def get_buildings(self):
+        return await self._call(self.sync.get_buildings)
+
+    async def get_rooms_by_building(self):
+        return await self._call(self.sync.get_rooms_by_building)
+
+    async def add_event(self, building, room, date, start_time, end_time, event_title="", notes="", status="User Reported"):
+        return await self._call(self.sync.add_event, building, room, date, start_time, end_time, event_title, notes=notes, status=status)
+
+    async def remove_user_event(self, building, room, date, start_time, end_time):
+        return await self._call(self.sync.remove_user_event, building, room, date, start_time, end_time)
+
+    async def cancel_event(self, building, room, date, start_time, end_time, notes=""):
+        return await self._call(self.sync.cancel_event, building, room, date, start_time, end_time, notes=notes)
+
+    async def uncancel_event(self, building, room, date, start_time, end_time, notes=""):
+        return await self._call(self.sync.uncancel_event, building, room, date, start_time, end_time, notes=notes)
+
+    async def get_rooms_with_sufficient_gap(self, building, room, date, start_time, end_time, min_duration, limit=50):
+        return await self._call(self.sync.get_rooms_with_sufficient_gap, building, room, date, start_time, end_time, min_duration, limit=limit)
+
+    async def get_next_availability_on_date(self, building, room, date, start_time="00:00", end_time="23:59", min_duration=1):
+        return await self._call(self.sync.get_next_availability_on_date, building, room, date, start_time, end_time, min_duration)
+
+    async def get_rooms_with_next_availability(self, building, room, date, start_time, end_time, min_duration, limit=50):
+        return await self._call(self.sync.get_rooms_with_next_availability, building, room, date, start_time, end_time, min_duration, limit=limit)
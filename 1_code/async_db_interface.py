@@ -0,0 +1,68 @@
+# Written by Colby
+
+from abc import ABC, abstractmethod
+
+class AsyncDatabaseInterface(ABC):
+    """The DatabaseInterface methods as coroutines, for the ASGI app (asgi_app.py)."""
+    # Bumped whenever the set of buildings and rooms may have changed (rooms created, semester loaded)
+    catalog_generation = 0
+
+    @abstractmethod
+    async def initialize_db(self):
+        """Initialize the database connection."""
+        pass
+
+    @abstractmethod
+    async def get_room(self, room, building):
+        """Return a specific room by building and room number."""
+        pass
+
+    @abstractmethod
+    async def get_date_range(self):
+        """Return the first and last date with schedule data as "YYYY-MM-DD" strings, or None if unbounded."""
+        pass
+
+    @abstractmethod
+    async def get_buildings(self):
+        """Return a sorted list of unique buildings."""
+        pass
+
+    @abstractmethod
+    async def get_rooms_by_building(self):
+        """Return a dictionary mapping buildings to their room numbers."""
+        pass
+
+    @abstractmethod
+    async def add_event(self, building, room, date, start_time, end_time, event_title, notes, status):
+        """Add an event to the room's schedule for the specified date."""
+        pass
+
+    @abstractmethod
+    async def remove_user_event(self, room, building, date, start_time):
+        """Remove a user-reported event from the room's schedule."""
+        pass
+
+    @abstractmethod
+    async def cancel_event(self, room, building, date, start_time):
+        """Mark an event as cancelled in the room's schedule."""
+        pass
+
+    @abstractmethod
+    async def uncancel_event(self, room, building, date, start_time):
+        """Mark a cancelled event as scheduled again."""
+        pass
+
+    @abstractmethod
+    async def get_rooms_with_sufficient_gap(self, building, room, date, duration, limit):
+        """Return rooms with at least one gap of minimum duration."""
+        pass
+
+    @abstractmethod
+    async def get_next_availability_on_date(self, room, building, date, duration):
+        """Find the next available time slot that meets the minimum duration."""
+        pass
+
+    @abstractmethod
+    async def get_rooms_with_next_availability(self, building, room, date, start_time, end_time, min_duration, limit):
+        """Return rooms with at least one gap of minimum duration, each with its first qualifying time slot."""
+        pass
@@ -0,0 +1,125 @@
+# Written by Colby
+# MongoDatabase for the ASGI app: searches and catalog reads on pymongo's AsyncMongoClient
+
+import asyncio
+import time
+from pymongo import AsyncMongoClient
+from async_db import AsyncDatabaseAdapter
+from mongodb import MongoDatabase, MONGO_WARMUP, ROOMS_BY_BUILDING_PIPELINE
+from mongo_monitoring import monitoring_listeners
+from util import format_time_range
+
+class AsyncMongoDatabase(AsyncDatabaseAdapter):
+    """
+    Async MongoDatabase. The hot reads (availability searches, catalog) stream from an AsyncMongoClient
+    sharing the sync client's settings, so a request waiting on MongoDB doesn't hold a thread.
+    Everything else (writes, semester routing, alias checks, other search modes and schedule layouts) runs
+    the MongoDatabase methods in worker threads.
+    """
+    def __init__(self, db=None):
+        super().__init__(db or MongoDatabase(), offload=True)
+        self.client = None
+        self.db = None
+
+    async def initialize_db(self):
+        """Initialize the sync database, then open the async client. Call this from the serving event loop."""
+        await asyncio.to_thread(self.sync.initialize_db)
+        await self._connect()
+        return True
+
+    async def _connect(self):
+        """Open the async client with the sync client's connection settings."""
+        connection_string, options = self.sync._connection_settings()
+        self.client = AsyncMongoClient(connection_string, event_listeners=monitoring_listeners(), **options)
+        self.db = self.client[self.sync.database_name]
+        if MONGO_WARMUP:
+            await self._warm_up(options.get("minPoolSize", 0))
+
+    async def _warm_up(self, num_connections):
+        """Ping the server over num_connections pooled connections at once."""
+        start = time.perf_counter()
+        await self.client.admin.command("ping")
+        if num_connections > 1:
+            await asyncio.gather(*(self.client.admin.command("ping") for _ in range(num_connections)))
+        print(f"Async MongoDB warm-up readied {max(num_connections, 1)} connections in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+        self.sync.client.close()
+
+    def _collection_names(self, date=None):
+        """Return the physical collections serving a date (none if no semester serves it), or every semester's if no
+           date is given. Blocking (semester routing may reload the registry or check aliases), so run it in a thread.
+        """
+        semesters = [self.sync._semester(date)] if date else self.sync._all_semesters()
+        return [semester.collection.name for semester in semesters if semester is not None]
+
+    def _streams(self):
+        """Whether searches can stream the dated schedule layout directly from the async client."""
+        return self.sync.search_mode == "python" and self.sync.schedule_layout == "dated"
+
+    async def get_buildings(self):
+        """Return a sorted list of unique buildings across every semester, querying the semesters concurrently."""
+        names = await asyncio.to_thread(self._collection_names)
+        results = await asyncio.gather(*(self.db[name].distinct("building") for name in names))
+        return sorted({building for buildings in results for building in buildings})
+
+    async def get_rooms_by_building(self):
+        """Return a dictionary mapping buildings to their room numbers across every semester, querying the semesters concurrently."""
+        async def grouped(name):
+            cursor = await self.db[name].aggregate(ROOMS_BY_BUILDING_PIPELINE)
+            return await cursor.to_list()
+
+        names = await asyncio.to_thread(self._collection_names)
+        building_to_rooms = {}
+        # Merged in semester order (default first), like MongoDatabase.get_rooms_by_building
+        for docs in await asyncio.gather(*(grouped(name) for name in names)):
+            for doc in docs:
+                rooms = building_to_rooms.setdefault(doc["_id"], [])
+                rooms.extend(room for room in doc["rooms"] if room not in rooms)
+        return building_to_rooms
+
+    async def _first_free_ranges(self, building, room, date, start_time, end_time, min_duration, limit):
+        """Stream the matching rooms for a date and return up to limit (room, first qualifying slot) pairs."""
+        names = await asyncio.to_thread(self._collection_names, date)
+        if not names:
+            return [] # no semester serves the date
+        results = []
+        async for room_data in self.db[names[0]].find(self.sync._room_query(building, room), self.sync._date_projection(date)):
+            if len(results) >= limit:
+                break
+            slot = self.sync._first_free_range(room_data, date, start_time, end_time, min_duration)
+            if slot:
+                results.append((room_data, slot))
+        return results
+
+    async def get_rooms_with_sufficient_gap(self, building, room, date, start_time, end_time, min_duration, limit=50):
+        if not self._streams():
+            return await super().get_rooms_with_sufficient_gap(building, room, date, start_time, end_time, min_duration, limit)
+        min_duration = int(min_duration) if min_duration else 1
+        results = await self._first_free_ranges(building, room, date, start_time or "00:00", end_time or "23:59", min_duration, limit)
+        return [room_data for room_data, _ in results]
+
+    async def get_rooms_with_next_availability(self, building, room, date, start_time, end_time, min_duration, limit=50):
+        if not self._streams():
+            return await super().get_rooms_with_next_availability(building, room, date, start_time, end_time, min_duration, limit)
+        min_duration = int(min_duration) if min_duration else 1
+        results = await self._first_free_ranges(building, room, date, start_time or "00:00", end_time or "23:59", min_duration, limit)
+        return [{
+            "building": room_data['building'],
+            "room": room_data['room'],
+            "location": room_data.get('location'),
+            "next_availability": slot
+        } for room_data, slot in results]
+
+    async def get_next_availability_on_date(self, building, room, date, start_time="00:00", end_time="23:59", min_duration=1):
+        if self.sync.schedule_layout != "dated":
+            return await super().get_next_availability_on_date(building, room, date, start_time, end_time, min_duration)
+        min_duration = int(min_duration) if min_duration else 1
+        names = await asyncio.to_thread(self._collection_names, date)
+        if not names:
+            return None
+        room_data = await self.db[names[0]].find_one({"building": building, "room": room}, self.sync._date_projection(date))
+        slot = self.sync._first_free_range(room_data, date, start_time, end_time, min_duration)
+        return format_time_range(slot) if slot else None
@@ -0,0 +1,62 @@
+# Written by Colby
+
+import time
+from db_interface import DatabaseInterface
+
+class CatalogCache:
+    """
+    Read-through cache for the building and room catalog of any DatabaseInterface.
+    Entries are reused until the database's catalog_generation changes (rooms created, semester loaded)
+    or, if a ttl in seconds is given, until they are older than the ttl.
+    """
+    def __init__(self, db: DatabaseInterface, ttl=None):
+        self.db = db
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # name -> (generation, loaded at, value)
+
+    def _lookup(self, name, generation):
+        """Return whether a current entry is cached, and its value."""
+        entry = self._entries.get(name)
+        if entry is not None:
+            entry_generation, loaded_at, value = entry
+            if entry_generation == generation and (self.ttl is None or time.monotonic() - loaded_at < self.ttl):
+                self.hits += 1
+                return True, value
+        self.misses += 1
+        return False, None
+
+    def _get(self, name, loader):
+        generation = self.db.catalog_generation
+        found, value = self._lookup(name, generation)
+        if not found:
+            value = loader()
+            self._entries[name] = (generation, time.monotonic(), value)
+        return value
+
+    def get_buildings(self):
+        """Return a sorted list of unique buildings."""
+        return self._get("buildings", self.db.get_buildings)
+
+    def get_rooms_by_building(self):
+        """Return a dictionary mapping buildings to their room numbers."""
+        return self._get("rooms_by_building", self.db.get_rooms_by_building)
+
+    def invalidate(self):
+        """Drop all cached entries."""
+        self._entries = {}
+
+    def stats(self):
+        """Return the cache's hit and miss counters."""
+        return {"hits": self.hits, "misses": self.misses, "generation": self.db.catalog_generation}
+
+class AsyncCatalogCache(CatalogCache):
+    """CatalogCache for an AsyncDatabaseInterface; get_buildings and get_rooms_by_building return coroutines."""
+    async def _get(self, name, loader):
+        generation = self.db.catalog_generation
+        found, value = self._lookup(name, generation)
+        if not found:
+            value = await loader()
+            self._entries[name] = (generation, time.monotonic(), value)
+        return value
@@ -3,6 +3,9 @@
 from abc import ABC, abstractmethod
 
 class DatabaseInterface(ABC):
+    # Bumped whenever the set of buildings and rooms may have changed (rooms created, semester loaded)
+    catalog_generation = 0
+
     @abstractmethod
     def initialize_db(self):
         """Initialize the database connection."""
@@ -13,6 +16,11 @@ class DatabaseInterface(ABC):
         """Return a specific room by building and room number."""
         pass
 
+    @abstractmethod
+    def get_date_range(self):
+        """Return the first and last date with schedule data as "YYYY-MM-DD" strings, or None if unbounded."""
+        pass
+
     @abstractmethod
     def get_buildings(self):
         """Return a sorted list of unique buildings."""
@@ -51,4 +59,9 @@ class DatabaseInterface(ABC):
     @abstractmethod
     def get_next_availability_on_date(self, room, building, date, duration):
         """Find the next available time slot that meets the minimum duration."""
+        pass
+
+    @abstractmethod
+    def get_rooms_with_next_availability(self, building, room, date, start_time, end_time, min_duration, limit):
+        """Return rooms with at least one gap of minimum duration, each with its first qualifying time slot."""
         pass
\ No newline at end of file
@@ -0,0 +1,187 @@
+# Written by Colby
+# Request metrics in Prometheus text format, plus a per-request breakdown of where the time went
+
+import time
+import inspect
+import threading
+import contextvars
+from db_interface import DatabaseInterface
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name, help, label_names=()):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.values = {} # label values -> total
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, total in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {total}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self.values = {} # label values -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            counts = self.values.setdefault(label_values, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, counts in sorted(self.values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, [('le', '+Inf')])} {counts[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, label_values)} {counts[-2]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, label_values)} {counts[-1]}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, label_names=()):
+        metric = Counter(name, help, label_names)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, label_names=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, label_names, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+registry = MetricsRegistry()
+
+# Time spent in each component ("db", ...) during the current request: component -> [calls, seconds]
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+def start_request():
+    """Start collecting the current request's component timings."""
+    _request_timings.set({})
+
+def record_timing(component, seconds, calls=1):
+    """Add time spent in a component to the current request's breakdown, if one is being collected."""
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings.setdefault(component, [0, 0.0])
+        entry[0] += calls
+        entry[1] += seconds
+
+def finish_request():
+    """Stop collecting and return the current request's component timings."""
+    timings = _request_timings.get() or {}
+    _request_timings.set(None)
+    return timings
+
+# Components timed inside database calls (see mongo_monitoring.py), so their time is already part of "db"
+NESTED_COMPONENTS = {"mongo", "mongo_pool_wait"}
+
+def server_timing_header(timings, total_seconds):
+    """Format the component timings for a Server-Timing header, with the remainder attributed to the app."""
+    parts = []
+    accounted = 0.0
+    for component, (calls, seconds) in timings.items():
+        parts.append(f'{component};dur={seconds * 1000:.2f};desc="{calls} calls"')
+        if component not in NESTED_COMPONENTS:
+            accounted += seconds
+    parts.append(f"app;dur={max(total_seconds - accounted, 0) * 1000:.2f}")
+    parts.append(f"total;dur={total_seconds * 1000:.2f}")
+    return ", ".join(parts)
+
+HTTP_REQUEST_SECONDS = registry.histogram("roomfinder_http_request_seconds", "Time to handle a request.", ("route", "method", "status"))
+HTTP_RESPONSE_BYTES = registry.histogram("roomfinder_http_response_bytes", "Response body size.", ("route",), SIZE_BUCKETS)
+REQUEST_DB_CALLS = registry.histogram("roomfinder_request_db_calls", "Database calls made by a request.", ("route",), COUNT_BUCKETS)
+REQUEST_DB_SECONDS = registry.histogram("roomfinder_request_db_seconds", "Time a request spent in database calls.", ("route",))
+
+def record_request(route, method, status, elapsed, size, timings):
+    """Record a finished request's latency, response size and database calls."""
+    HTTP_REQUEST_SECONDS.observe(elapsed, route, method, status)
+    if size is not None:
+        HTTP_RESPONSE_BYTES.observe(size, route)
+    db_calls, db_seconds = timings.get("db", (0, 0.0))
+    REQUEST_DB_CALLS.observe(db_calls, route)
+    REQUEST_DB_SECONDS.observe(db_seconds, route)
+
+DB_CALLS = registry.counter("roomfinder_db_calls_total", "DatabaseInterface method calls.", ("method",))
+DB_CALL_SECONDS = registry.histogram("roomfinder_db_call_seconds", "Time spent in DatabaseInterface methods.", ("method",))
+
+class InstrumentedDatabase:
+    """
+    Proxy around a DatabaseInterface (or AsyncDatabaseInterface) that times every interface method call.
+    Everything else, including setting attributes, goes straight to the wrapped database.
+    """
+    def __init__(self, db):
+        object.__setattr__(self, "_db", db)
+        object.__setattr__(self, "_methods", {})
+
+    def __getattr__(self, name):
+        value = getattr(self._db, name)
+        if not callable(value) or name.startswith("_") or not hasattr(DatabaseInterface, name):
+            return value
+        method = self._methods.get(name)
+        if method is None or method.__wrapped__ != value:
+            method = self._timed(name, value)
+            self._methods[name] = method
+        return method
+
+    def __setattr__(self, name, value):
+        setattr(self._db, name, value)
+
+    def _timed(self, name, method):
+        def record(elapsed):
+            DB_CALLS.inc(name)
+            DB_CALL_SECONDS.observe(elapsed, name)
+            record_timing("db", elapsed)
+
+        if inspect.iscoroutinefunction(method):
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    record(time.perf_counter() - start)
+            timed.__wrapped__ = method
+            return timed
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(time.perf_counter() - start)
+        timed.__wrapped__ = method
+        return timed
@@ -2,8 +2,16 @@
 
 from db_interface import DatabaseInterface
 from datetime import datetime, timedelta
-from util import to_minutes
+from util import to_minutes, compute_available_slots, find_free_minutes, first_free_range, format_time_range, make_event, event_minutes
+from occupancy import OccupancyIndex
+from recurrence import is_recurring, events_on_date, has_date, materialize_date, expand_schedule
 import random
+import os
+
+# How availability searches are computed:
+# - "bitmap": vectorized search over per-date occupancy arrays (default)
+# - "sweep": sweep each room's schedule in Python
+AVAILABILITY_ENGINE = os.getenv("AVAILABILITY_ENGINE", "bitmap")
 
 # Simulated database for UTD Room Finder
 
@@ -16,14 +24,62 @@ import random
 #     - Time Block (dict): Represents a scheduled event
 #       - start_time (str): Start time in 24-hour format (e.g., "09:00")
 #       - end_time (str): End time in 24-hour format (e.g., "11:00")
+#       - start_min (int): Start time in minutes since midnight (e.g., 540)
+#       - end_min (int): End time in minutes since midnight (e.g., 660)
 #       - status (str): "Scheduled", "Cancelled", or "User Reported"
 #       - event_title (str): Event name (e.g., "ENGL 1301")
 #       - notes (str): Additional notes about the event or cancellation
+# Rooms can also be stored as weekly recurrence rules plus per-date overrides (see recurrence.py),
+# resolved against self.calendar.
 
 class MockDatabase(DatabaseInterface):
-    def __init__(self):
+    def __init__(self, availability_engine=AVAILABILITY_ENGINE):
+        self.availability_engine = availability_engine
+        self.calendar = None # SemesterCalendar for rooms stored as recurrence rules
         self.rooms = []
 
+    @property
+    def rooms(self):
+        return self._rooms
+
+    @rooms.setter
+    def rooms(self, rooms):
+        # Replacing the rooms rebuilds the lookup indexes and resets the occupancy index
+        self._rooms = []
+        self._room_index = {}      # (building, room) -> room
+        self._building_index = {}  # building -> rooms in that building
+        self._occupancy = OccupancyIndex(events_on_date=self._events_on_date) if self.availability_engine == "bitmap" else None
+        for room_data in rooms:
+            self._index_room(room_data)
+        self.catalog_generation += 1
+
+    def _index_room(self, room_data):
+        """Store a room and add it to the lookup indexes."""
+        key = (room_data['building'], room_data['room'])
+        if key in self._room_index:
+            return # keep the first copy of a duplicated room
+        self._rooms.append(room_data)
+        self._room_index[key] = room_data
+        self._building_index.setdefault(room_data['building'], []).append(room_data)
+        if self._occupancy is not None:
+            self._occupancy.add_room(room_data)
+
+    def add_room(self, building, room, schedule=None, location=None):
+        """Create a room if it doesn't exist and return it."""
+        room_data = self._room(building, room)
+        if room_data is None:
+            room_data = {"room": room, "building": building, "schedule": schedule or {}}
+            if location:
+                room_data["location"] = location
+            self._index_room(room_data)
+            self.catalog_generation += 1
+        return room_data
+
+    def _schedule_changed(self, building, room, date):
+        """Keep the occupancy index in sync after a room's schedule changed."""
+        if self._occupancy is not None:
+            self._occupancy.update_room(building, room, date)
+
     def initialize_db(self, generate_data=True):
         """Initialize the mock database with room data."""
         if generate_data:
@@ -63,7 +119,7 @@ class MockDatabase(DatabaseInterface):
         
         # Randomly select events to simulate realistic schedules
         num_events = random.randint(2, 5)
-        return random.sample(event_templates, num_events)
+        return [make_event(**template) for template in random.sample(event_templates, num_events)]
 
     def _create_mock_rooms(self):
         # Define rooms and buildings
@@ -96,38 +152,65 @@ class MockDatabase(DatabaseInterface):
         return mock_rooms
 
     # Functions to interact with the mock database
+    def _room(self, building, room):
+        """Return the stored room, in whichever layout it is kept."""
+        return self._room_index.get((building, room))
+
+    def _events_on_date(self, room_data, date):
+        """Return a room's time blocks for a date."""
+        if is_recurring(room_data):
+            return events_on_date(room_data, date, self.calendar)
+        return room_data['schedule'].get(date, [])
+
+    def _has_date(self, room_data, date):
+        """Check whether a room has a schedule entry for a date."""
+        if is_recurring(room_data):
+            return has_date(room_data, date, self.calendar)
+        return date in room_data['schedule']
+
+    def _editable_events(self, room_data, date):
+        """Return the stored list of a date's time blocks so it can be changed in place, creating it if needed."""
+        if is_recurring(room_data):
+            return materialize_date(room_data, date, self.calendar)
+        return room_data['schedule'].setdefault(date, [])
+
     def get_room(self, building, room):
         """Return a specific room by building and room number."""
-        return next((r for r in self.rooms if r['room'] == room and r['building'] == building), None)
+        room_data = self._room(building, room)
+        if room_data is not None and is_recurring(room_data):
+            # Present recurring rooms with the same dated schedule as every other room
+            expanded = {key: value for key, value in room_data.items() if key not in ('recurrence', 'overrides')}
+            expanded['schedule'] = expand_schedule(room_data, self.calendar)
+            return expanded
+        return room_data
+
+    def get_date_range(self):
+        """Return the first and last day of the semester calendar, or None if there is none."""
+        if self.calendar is None:
+            return None
+        return self.calendar.start_date, self.calendar.end_date
 
     def get_buildings(self):
         """Return a sorted list of unique buildings."""
-        return sorted(set(room['building'] for room in self.rooms))
+        return sorted(self._building_index)
 
     def get_rooms_by_building(self):
         """Return a dictionary mapping buildings to their room numbers."""
-        building_to_rooms = {}
-        for room in self.rooms:
-            building = room['building']
-            if building not in building_to_rooms:
-                building_to_rooms[building] = []
-            building_to_rooms[building].append(room['room'])
-        return building_to_rooms
+        return {building: [room['room'] for room in rooms] for building, rooms in self._building_index.items()}
 
     def _check_overlap(self, building, room, date, start_time, end_time):
         """Check if the new event overlaps with any existing non-cancelled events."""
-        room_data = self.get_room(building, room)
-        if not room_data or date not in room_data['schedule']:
+        room_data = self._room(building, room)
+        if not room_data or not self._has_date(room_data, date):
             return False  # No events, so no overlap
 
         start_minutes = to_minutes(start_time)
         end_minutes = to_minutes(end_time)
 
-        for slot in room_data['schedule'][date]:
+        for slot in self._events_on_date(room_data, date):
             if slot['status'] == "Cancelled":
                 continue  # Ignore cancelled events
-            slot_start = to_minutes(slot['start_time'])
-            slot_end = to_minutes(slot['end_time'])
+            slot_start, slot_end = event_minutes(slot)
             # Check for overlap: if the new event starts before the existing event ends and ends after the existing event starts
             if start_minutes < slot_end and end_minutes > slot_start:
                 return True  # Overlap found
@@ -135,7 +218,7 @@ class MockDatabase(DatabaseInterface):
 
     def add_event(self, building, room, date, start_time, end_time, event_title, notes="", status="User Reported"):
         """Add an event to the room's schedule for the specified date with validation."""
-        room_data = self.get_room(building, room)
+        room_data = self._room(building, room)
         if not room_data:
             return "Room not found"
 
@@ -150,134 +233,93 @@ class MockDatabase(DatabaseInterface):
             return "Event overlaps with an existing event"
 
         # Add the event
-        if date not in room_data['schedule']:
-            room_data['schedule'][date] = []
-        room_data['schedule'][date].append({
-            "start_time": start_time,
-            "end_time": end_time,
-            "status": status,
-            "event_title": event_title,
-            "notes": notes
-        })
+        events = self._editable_events(room_data, date)
+        events.append(make_event(start_time, end_time, status, event_title, notes))
         # Sort the schedule by start time
-        room_data['schedule'][date].sort(key=lambda x: x['start_time'])
+        events.sort(key=lambda x: event_minutes(x)[0])
+        self._schedule_changed(building, room, date)
         return True
 
     def remove_user_event(self, building, room, date, start_time, end_time):
         """Remove a user-reported event from the room's schedule for the specified date and time block."""
-        room_data = self.get_room(building, room)
-        if not room_data or date not in room_data['schedule']:
+        room_data = self._room(building, room)
+        if not room_data or not self._has_date(room_data, date):
             return False
-        schedule = room_data['schedule'][date]
-        room_data['schedule'][date] = [
-            slot for slot in schedule
+        events = self._editable_events(room_data, date)
+        events[:] = [
+            slot for slot in events
             if not (slot['start_time'] == start_time and slot['end_time'] == end_time and slot['status'] == "User Reported")
         ]
+        self._schedule_changed(building, room, date)
         return True
 
     def cancel_event(self, building, room, date, start_time, end_time, notes=""):
         """Mark an event as cancelled in the room's schedule for the specified date and time block."""
-        room_data = self.get_room(building, room)
-        if not room_data or date not in room_data['schedule']:
+        room_data = self._room(building, room)
+        if not room_data or not self._has_date(room_data, date):
             return False
-        for slot in room_data['schedule'][date]:
+        for index, slot in enumerate(self._events_on_date(room_data, date)):
             if slot['start_time'] == start_time and slot['end_time'] == end_time and slot['status'] == "Scheduled":
+                slot = self._editable_events(room_data, date)[index]
                 slot['status'] = "Cancelled"
                 # Prepend standard message and append explanation if provided
                 base_message = "User reported event as cancelled."
                 slot['notes'] = base_message if not notes else f"{base_message} Explanation: {notes}"
+                self._schedule_changed(building, room, date)
                 return True
         return False
 
     def uncancel_event(self, building, room, date, start_time, end_time, notes=""):
         """Mark a cancelled event as scheduled again in the room's schedule for the specified date and time block."""
-        room_data = self.get_room(building, room)
-        if not room_data or date not in room_data['schedule']:
+        room_data = self._room(building, room)
+        if not room_data or not self._has_date(room_data, date):
             return False
-        for slot in room_data['schedule'][date]:
+        for index, slot in enumerate(self._events_on_date(room_data, date)):
             if slot['start_time'] == start_time and slot['end_time'] == end_time and slot['status'] == "Cancelled":
+                slot = self._editable_events(room_data, date)[index]
                 slot['status'] = "Scheduled"
                 # Overwrite notes with uncancel message
                 base_message = "User Confirmed."
                 slot['notes'] = base_message if not notes else f"{base_message} Explanation: {notes}"
+                self._schedule_changed(building, room, date)
                 return True
         return False
 
     def find_available_slots(self, building, room, date, start_time="00:00", end_time="23:59"):
         """Find all available time slots for a room on a given date within the specified time range."""
-        room_data = self.get_room(building, room)
-        if not room_data or date not in room_data['schedule'] or not room_data['schedule'][date]:
-            # If no events, the entire time range is available
-            return [(start_time, end_time)]
-
-        # Convert times to minutes for easier comparison
-        start_minutes = to_minutes(start_time)
-        end_minutes = to_minutes(end_time)
-
-        # Get events for the day, excluding cancelled ones
-        events = [slot for slot in room_data['schedule'][date] if slot['status'] != "Cancelled"]
-        events.sort(key=lambda x: to_minutes(x['start_time']))
-
-        available_slots = []
-        current_time = start_minutes
-
-        # Check gaps between events
-        for event in events:
-            event_start = to_minutes(event['start_time'])
-            event_end = to_minutes(event['end_time'])
-
-            # Skip events that end before the start time or start after the end time
-            if event_end <= start_minutes or event_start >= end_minutes:
-                continue
-
-            # If there's a gap before this event starts
-            if current_time < event_start and event_start <= end_minutes:
-                slot_start = max(current_time, start_minutes)
-                slot_end = event_start
-                if slot_start < slot_end:
-                    available_slots.append((
-                        f"{slot_start // 60:02d}:{slot_start % 60:02d}",
-                        f"{slot_end // 60:02d}:{slot_end % 60:02d}"
-                    ))
-
-            # Move the current time to the end of this event
-            current_time = max(current_time, event_end)
-
-        # Check for a gap after the last event
-        if current_time < end_minutes:
-            available_slots.append((
-                f"{current_time // 60:02d}:{current_time % 60:02d}",
-                f"{end_minutes // 60:02d}:{end_minutes % 60:02d}"
-            ))
-
-        return available_slots
+        room_data = self._room(building, room)
+        events = self._events_on_date(room_data, date) if room_data else []
+        return compute_available_slots(events, start_time, end_time)
 
     def get_next_availability_on_date(self, building, room, date, start_time="00:00", end_time="23:59", min_duration=1):
         """
         Find the next available time slot on the specified date that meets the criteria.
         Returns the time slot as a string (e.g., "10:00 - 12:00") or None if no slot is available.
         """
-        available_slots = self.find_available_slots(building, room, date, start_time, end_time)
         min_duration = int(min_duration) if min_duration else 1
+        if self._occupancy is not None and (building, room) in self._occupancy.rows:
+            results = self._bitmap_search(building, room, date, start_time, end_time, min_duration, limit=1)
+            return format_time_range(results[0][1]) if results else None
 
         # Find the first slot that meets the minimum duration
-        for slot_start, slot_end in available_slots:
-            slot_duration = to_minutes(slot_end) - to_minutes(slot_start)
-            if slot_duration >= min_duration:
-                return f"{slot_start} - {slot_end}"
-        
-        return None
-
-    def _has_sufficient_gap(self, building, room, date, start_time, end_time, min_duration):
-        """Check if a room has a gap of at least min_duration minutes between start_time and end_time."""
-        available_slots = self.find_available_slots(building, room, date, start_time, end_time)
-        for slot_start, slot_end in available_slots:
-            slot_start_minutes = to_minutes(slot_start)
-            slot_end_minutes = to_minutes(slot_end)
-            slot_duration = slot_end_minutes - slot_start_minutes
-            if slot_duration >= min_duration:
-                return True
-        return False
+        slot = self._first_free_range(self._room(building, room), date, start_time, end_time, min_duration)
+        return format_time_range(slot) if slot else None
+
+    def _first_free_range(self, room_data, date, start_time, end_time, min_duration):
+        """Return the room's first free (start, end) minute range lasting at least min_duration minutes, or None."""
+        events = self._events_on_date(room_data, date) if room_data else []
+        free_ranges = find_free_minutes(events, to_minutes(start_time), to_minutes(end_time))
+        return first_free_range(free_ranges, min_duration)
+
+    def _matching_rooms(self, building, room):
+        """Return rooms matching the optional building and room filters."""
+        if building != None and room != None:
+            room_data = self._room(building, room)
+            return [room_data] if room_data else []
+        rooms = self._building_index.get(building, []) if building != None else self.rooms
+        if room != None:
+            return [room_data for room_data in rooms if room_data['room'] == room]
+        return rooms
 
     def get_rooms_with_sufficient_gap(self, building, room, date, start_time, end_time, min_duration, limit=50):
         """Return a list of rooms in the specified building with at least one gap of min_duration minutes."""
@@ -288,15 +330,54 @@ class MockDatabase(DatabaseInterface):
         # If no duration is provided, set a minimal duration to ensure some availability
         min_duration = int(min_duration) if min_duration else 1
 
+        if self._occupancy is not None:
+            return [room_data for room_data, _ in self._bitmap_search(building, room, date, start_time, end_time, min_duration, limit)]
+
         free_rooms = []
-        for room_data in self.rooms:
+        for room_data in self._matching_rooms(building, room):
             if len(free_rooms) >= limit:
                 break
-            if building != None and room_data['building'] != building:
-                continue
-            if room != None and room_data['room'] != room:
-                continue
             # Otherwise, check for sufficient gaps
-            if self._has_sufficient_gap(room_data['building'], room_data['room'], date, start_time, end_time, min_duration):
+            if self._first_free_range(room_data, date, start_time, end_time, min_duration):
                 free_rooms.append(room_data)
-        return free_rooms
\ No newline at end of file
+        return free_rooms
+
+    def get_rooms_with_next_availability(self, building, room, date, start_time, end_time, min_duration, limit=50):
+        """Return rooms with a sufficient gap together with their first qualifying (start, end) minutes, in a single pass."""
+        start_time = start_time or "00:00"
+        end_time = end_time or "23:59"
+        min_duration = int(min_duration) if min_duration else 1
+
+        if self._occupancy is not None:
+            return [{
+                "building": room_data['building'],
+                "room": room_data['room'],
+                "location": room_data.get('location'),
+                "next_availability": next_availability
+            } for room_data, next_availability in self._bitmap_search(building, room, date, start_time, end_time, min_duration, limit)]
+
+        results = []
+        for room_data in self._matching_rooms(building, room):
+            if len(results) >= limit:
+                break
+            # Work on the room we already have instead of looking it up again
+            slot = self._first_free_range(room_data, date, start_time, end_time, min_duration)
+            if slot:
+                results.append({
+                    "building": room_data['building'],
+                    "room": room_data['room'],
+                    "location": room_data.get('location'),
+                    "next_availability": slot
+                })
+        return results
+
+    def _bitmap_search(self, building, room, date, start_time, end_time, min_duration, limit):
+        """Return (room, (start, end) minutes) pairs for matching rooms with a sufficient gap, using the occupancy index."""
+        rows = self._occupancy.rows_matching(building, room)
+        rows, slot_starts, slot_ends = self._occupancy.first_slots(
+            date, to_minutes(start_time), to_minutes(end_time), min_duration, rows, limit)
+        return [
+            (self._occupancy.rooms[row], (slot_start, slot_end))
+            for row, slot_start, slot_end in zip(rows.tolist(), slot_starts.tolist(), slot_ends.tolist())
+        ]
+
@@ -0,0 +1,139 @@
+# Written by Colby
+# Opt-in MongoDB command and connection pool monitoring, reported through the app's /metrics
+
+import json
+import os
+import bson
+from pymongo import monitoring
+from metrics import registry, record_timing, COUNT_BUCKETS
+
+# Set MONGO_MONITORING=1 to attach the listeners to the MongoClient
+MONGO_MONITORING = os.getenv("MONGO_MONITORING", "0") == "1"
+# Commands slower than this many milliseconds are logged with their query shape
+MONGO_SLOW_QUERY_MS = float(os.getenv("MONGO_SLOW_QUERY_MS", "100"))
+
+MONGO_COMMANDS = registry.counter("roomfinder_mongo_commands_total", "MongoDB commands.", ("collection", "command"))
+MONGO_COMMAND_FAILURES = registry.counter("roomfinder_mongo_command_failures_total", "Failed MongoDB commands.", ("collection", "command"))
+MONGO_COMMAND_SECONDS = registry.histogram("roomfinder_mongo_command_seconds", "MongoDB command round trip time.", ("collection", "command"))
+MONGO_DOCUMENTS = registry.histogram("roomfinder_mongo_documents_returned", "Documents returned by a MongoDB command.", ("collection", "command"), COUNT_BUCKETS)
+MONGO_POOL_WAIT_SECONDS = registry.histogram("roomfinder_mongo_pool_wait_seconds", "Time spent waiting to check out a pooled connection.")
+MONGO_POOL_CHECKOUT_FAILURES = registry.counter("roomfinder_mongo_pool_checkout_failures_total", "Failed connection checkouts.", ("reason",))
+MONGO_CONNECTIONS_CREATED = registry.counter("roomfinder_mongo_connections_created_total", "Pooled connections opened.")
+
+# The filter of each command, to log the shape of slow queries
+FILTER_FIELDS = {"find": "filter", "count": "query", "distinct": "query", "findAndModify": "query"}
+
+def query_shape(value):
+    """Replace the literal values in a query with "?", keeping field names and operators."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [query_shape(item) for item in value]
+        # Lists of literals (e.g. $in) collapse to one placeholder
+        return shapes if any(isinstance(item, (dict, list)) for item in shapes) else "?"
+    return "?"
+
+def command_shape(command_name, command):
+    """Return the query shape of a command: its filter, pipeline, or update/delete queries."""
+    if command_name in FILTER_FIELDS:
+        return query_shape(command.get(FILTER_FIELDS[command_name], {}))
+    if command_name == "aggregate":
+        return [query_shape(stage) for stage in command.get("pipeline", [])]
+    if command_name == "update":
+        return [query_shape(update.get("q", {})) for update in command.get("updates", [])]
+    if command_name == "delete":
+        return [query_shape(delete.get("q", {})) for delete in command.get("deletes", [])]
+    return None
+
+def documents_returned(reply):
+    """Return how many documents a command reply carries."""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if "value" in reply: # findAndModify
+        return 0 if reply["value"] is None else 1
+    return reply.get("n", 0)
+
+class CommandMonitor(monitoring.CommandListener):
+    """Counts and times every command per collection and logs the slow ones."""
+    def __init__(self, slow_query_ms=MONGO_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._started = {} # (connection, request id) -> (collection, command)
+
+    def started(self, event):
+        # The collection is the command's first value, except for getMore
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self._started[(event.connection_id, event.request_id)] = (collection if isinstance(collection, str) else "", event.command)
+
+    def succeeded(self, event):
+        collection, command = self._started.pop((event.connection_id, event.request_id), ("", None))
+        seconds = event.duration_micros / 1e6
+        documents = documents_returned(event.reply)
+        MONGO_COMMANDS.inc(collection, event.command_name)
+        MONGO_COMMAND_SECONDS.observe(seconds, collection, event.command_name)
+        MONGO_DOCUMENTS.observe(documents, collection, event.command_name)
+        record_timing("mongo", seconds)
+        if seconds * 1000 >= self.slow_query_ms:
+            # The reply arrives decoded, so its size costs another encode; only pay it for the slow ones
+            size = len(bson.encode(event.reply))
+            self._log_slow(event.command_name, collection, command, seconds, f"{documents} documents, {size} bytes")
+
+    def failed(self, event):
+        collection, command = self._started.pop((event.connection_id, event.request_id), ("", None))
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMANDS.inc(collection, event.command_name)
+        MONGO_COMMAND_FAILURES.inc(collection, event.command_name)
+        MONGO_COMMAND_SECONDS.observe(seconds, collection, event.command_name)
+        record_timing("mongo", seconds)
+        if seconds * 1000 >= self.slow_query_ms:
+            self._log_slow(event.command_name, collection, command, seconds, f"failed: {event.failure.get('errmsg', '')}")
+
+    def _log_slow(self, command_name, collection, command, seconds, outcome):
+        shape = command_shape(command_name, command) if command is not None else None
+        print(f"Slow MongoDB {command_name} on {collection or '-'}: {seconds * 1000:.1f} ms, {outcome}, "
+              f"shape {json.dumps(shape, default=str)}")
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Records how long operations wait to check out a connection, to spot pool starvation."""
+    def connection_checked_out(self, event):
+        if event.duration is not None:
+            MONGO_POOL_WAIT_SECONDS.observe(event.duration)
+            record_timing("mongo_pool_wait", event.duration)
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.inc(event.reason)
+        if event.duration is not None:
+            MONGO_POOL_WAIT_SECONDS.observe(event.duration)
+
+    def connection_created(self, event):
+        MONGO_CONNECTIONS_CREATED.inc()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+def monitoring_listeners():
+    """Return the listeners to pass to MongoClient(event_listeners=...), or none if monitoring is off."""
+    if not MONGO_MONITORING:
+        return []
+    return [CommandMonitor(), PoolMonitor()]
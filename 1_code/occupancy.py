@@ -0,0 +1,178 @@
+# Written by Colby
+# Minute-resolution occupancy bitmaps for vectorized availability searches
+
+import os
+import numpy as np
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from util import event_minutes
+
+MINUTES_PER_DAY = 24 * 60
+ROW_BYTES = MINUTES_PER_DAY // 8 # one bit per minute
+ROW_BLOCK = 2048 # rows searched per vectorized step
+# Dates whose occupancy is kept in memory; the least recently searched date is dropped beyond this
+OCCUPANCY_CACHE_DAYS = int(os.getenv("OCCUPANCY_CACHE_DAYS", "64"))
+
+def pack_events(events):
+    """Return a row of occupancy bits for a day's non-cancelled events."""
+    row = np.zeros(MINUTES_PER_DAY, dtype=bool)
+    for event in events:
+        if event['status'] == "Cancelled":
+            continue
+        start_min, end_min = event_minutes(event)
+        row[start_min:end_min] = True
+    return np.packbits(row)
+
+class OccupancySearch(ABC):
+    """
+    Vectorized availability search over per-date (rooms x 1440 minutes) occupancy bits, packed 8 minutes
+    to a byte. Subclasses provide the rooms (one dict per row) and the packed day arrays; searching never
+    changes them.
+    """
+    def __init__(self):
+        self.rooms = []  # room dicts, one per row
+        self.rows = {}   # (building, room) -> row
+        self.building_rows = {} # building -> rows in that building
+
+    @abstractmethod
+    def day(self, date):
+        """Return the packed occupancy array of shape (rooms, ROW_BYTES) for a date."""
+        pass
+
+    def window(self, date, rows, start_minutes, end_minutes):
+        """Return the occupancy of the given rows between start_minutes and end_minutes on a date, as booleans."""
+        # Unpack only the bytes covering the window
+        first_byte = start_minutes // 8
+        bits = np.unpackbits(self.day(date)[rows, first_byte:-(-end_minutes // 8)], axis=1)
+        offset = start_minutes - first_byte * 8
+        return bits[:, offset:offset + end_minutes - start_minutes].astype(bool)
+
+    def rows_matching(self, building=None, room=None):
+        """Return the rows of rooms matching the optional building and room filters, in row order (None for all rooms)."""
+        if building is None and room is None:
+            return None
+        if building is not None and room is not None:
+            row = self.rows.get((building, room))
+            return np.array([] if row is None else [row], dtype=np.intp)
+        candidates = self.building_rows.get(building, []) if building is not None else range(len(self.rooms))
+        return np.array([
+            row for row in candidates
+            if room is None or self.rooms[row]['room'] == room
+        ], dtype=np.intp)
+
+    def first_slots(self, date, start_minutes, end_minutes, min_duration, rows=None, limit=None):
+        """
+        Find, for all rooms at once, the first free run of at least min_duration minutes inside
+        [start_minutes, end_minutes). Returns (rows, slot_starts, slot_ends) for rooms that have one, in row order.
+        """
+        empty = np.array([], dtype=np.intp)
+        width = end_minutes - start_minutes
+        min_duration = max(int(min_duration), 1)
+        if width < min_duration or not self.rooms:
+            return empty, empty, empty
+
+        if rows is None:
+            rows = np.arange(len(self.rooms))
+        if not len(rows):
+            return empty, empty, empty
+
+        # Search a block of rows at a time so small limits stop early on large campuses
+        found_rows, found_starts, found_ends = [], [], []
+        found = 0
+        block_start = 0
+        block_size = ROW_BLOCK if limit is None else min(ROW_BLOCK, max(64, 4 * limit))
+        while block_start < len(rows):
+            block_rows = rows[block_start:block_start + block_size]
+            block_start += block_size
+            block_size = min(2 * block_size, ROW_BLOCK)
+            window = self.window(date, block_rows, start_minutes, end_minutes)
+            free_runs = _free_runs(~window, min_duration)
+
+            hits = np.flatnonzero(free_runs.any(axis=1))
+            if limit is not None:
+                hits = hits[:limit - found]
+            # The first free run starts exactly where the first long enough gap starts
+            starts = free_runs[hits].argmax(axis=1)
+            # The gap ends at the first occupied minute after its start, or at the end of the window
+            after_start = window[hits] & (np.arange(width) >= starts[:, None])
+            ends = np.where(after_start.any(axis=1), after_start.argmax(axis=1), width)
+
+            found_rows.append(block_rows[hits])
+            found_starts.append(starts + start_minutes)
+            found_ends.append(ends + start_minutes)
+            found += len(hits)
+            if limit is not None and found >= limit:
+                break
+        return np.concatenate(found_rows), np.concatenate(found_starts), np.concatenate(found_ends)
+
+class OccupancyIndex(OccupancySearch):
+    """
+    Keeps, per date, a (rooms x 1440 minutes) bit array of non-cancelled occupancy built from the
+    rooms' schedule dicts (same schema as MockDatabase/MongoDatabase), packed 8 minutes to a byte. Day arrays
+    are built lazily the first time a date is searched, updated one row at a time when a room's schedule
+    changes, and dropped least recently used first beyond max_days dates.
+    """
+    def __init__(self, rooms=(), events_on_date=None, max_days=OCCUPANCY_CACHE_DAYS):
+        super().__init__()
+        # Resolves a room's time blocks for a date; defaults to the dated schedule layout
+        self.events_on_date = events_on_date or (lambda room_data, date: room_data['schedule'].get(date, []))
+        self.days = OrderedDict() # date -> np.ndarray of shape (rooms, ROW_BYTES), least recently used first
+        self.max_days = max_days
+        for room_data in rooms:
+            self.add_room(room_data)
+
+    def add_room(self, room_data):
+        """Add a room as a new row."""
+        row = len(self.rooms)
+        self.rows[(room_data['building'], room_data['room'])] = row
+        self.building_rows.setdefault(room_data['building'], []).append(row)
+        self.rooms.append(room_data)
+        # Grow the day arrays that were already built
+        for date, day in self.days.items():
+            self.days[date] = np.vstack([day, pack_events(self.events_on_date(room_data, date))])
+
+    def day(self, date):
+        """Return the packed occupancy array for a date, building it on first use."""
+        day = self.days.get(date)
+        if day is None:
+            day = np.zeros((len(self.rooms), ROW_BYTES), dtype=np.uint8)
+            for row, room_data in enumerate(self.rooms):
+                events = self.events_on_date(room_data, date)
+                if events:
+                    day[row] = pack_events(events)
+            self.days[date] = day
+            if len(self.days) > self.max_days:
+                self.days.popitem(last=False)
+        else:
+            self.days.move_to_end(date)
+        return day
+
+    def update_room(self, building, room, date):
+        """Refresh a room's row after its schedule changed on the given date."""
+        row = self.rows.get((building, room))
+        if row is not None and date in self.days:
+            self.days[date][row] = pack_events(self.events_on_date(self.rooms[row], date))
+
+def _free_runs(free, length):
+    """
+    Return an array whose [r, i] entry is True when free[r, i:i + length] is all True.
+    Runs are combined by binary decomposition of length (runs of 1, 2, 4, ... minutes), so the
+    work is a handful of vectorized ANDs instead of a scan per room.
+    """
+    width = free.shape[1]
+    run, run_length = free, 1
+    result, result_length = None, 0
+    while True:
+        if length & 1:
+            if result is None:
+                result, result_length = run, run_length
+            else:
+                n = width - (result_length + run_length) + 1
+                result = result[:, :n] & run[:, result_length:result_length + n]
+                result_length += run_length
+        length >>= 1
+        if not length:
+            return result
+        n = width - 2 * run_length + 1
+        run = run[:, :n] & run[:, run_length:run_length + n]
+        run_length *= 2
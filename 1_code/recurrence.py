@@ -0,0 +1,137 @@
+# Written by Colby
+# Recurring-pattern schedule storage
+
+import copy
+from collections import Counter
+from datetime import datetime, timedelta
+
+'''
+Instead of repeating every weekly class on every date of the semester, a room can be stored as
+weekly recurrence rules plus a sparse map of per-date overrides:
+
+Schema (recurring layout):
+- Room: Represents a room on campus
+  - room (str), building (str), location (str, optional)
+  - recurrence (dict): Weekday ("0" = Monday ... "6" = Sunday) -> list of time blocks that happen
+    on every class day with that weekday
+  - overrides (dict): Date ("YYYY-MM-DD") -> complete list of time blocks for that date.
+    A date is copied from its recurrence rule the first time it changes (cancellation, user report),
+    so every other date is resolved from the rules on the fly.
+- Semester calendar: one document per semester collection in the "semesters" collection
+  - collection (str): Name of the semester collection (e.g., "2025_Spring")
+  - start_date, end_date (str): First and last day of classes ("YYYY-MM-DD")
+  - holidays (list of str): Days without classes
+  - layout (str): How the collection stores schedules ("dated", "recurring" or "room_day"; "dated" if missing).
+    The app only serves the semesters stored in its SCHEDULE_LAYOUT.
+'''
+
+SEMESTERS_COLLECTION = "semesters"
+
+def weekday_key(date):
+    """Return the recurrence key ("0" = Monday) for a date string."""
+    return str(datetime.strptime(date, "%Y-%m-%d").weekday())
+
+def is_recurring(room_data):
+    """Check whether a room is stored as recurrence rules rather than a dated schedule."""
+    return 'recurrence' in room_data
+
+class SemesterCalendar:
+    """First and last day of classes plus holidays for one semester."""
+    def __init__(self, start_date, end_date, holidays=()):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.holidays = set(holidays)
+
+    @classmethod
+    def from_document(cls, doc):
+        return cls(doc['start_date'], doc['end_date'], doc.get('holidays', []))
+
+    def to_document(self, collection, layout="dated"):
+        return {
+            "collection": collection,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "holidays": sorted(self.holidays),
+            "layout": layout
+        }
+
+    def is_class_day(self, date):
+        """Check whether recurrence rules apply on a date (YYYY-MM-DD strings compare chronologically)."""
+        return self.start_date <= date <= self.end_date and date not in self.holidays
+
+    def class_days(self):
+        """Return every class day of the semester."""
+        first_day = datetime.strptime(self.start_date, "%Y-%m-%d")
+        num_days = (datetime.strptime(self.end_date, "%Y-%m-%d") - first_day).days + 1
+        dates = [(first_day + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(num_days)]
+        return [date for date in dates if date not in self.holidays]
+
+def events_on_date(room_data, date, calendar):
+    """Resolve a recurring room's effective list of time blocks for a date."""
+    overrides = room_data.get('overrides', {})
+    if date in overrides:
+        return overrides[date]
+    if calendar is not None and calendar.is_class_day(date):
+        return room_data.get('recurrence', {}).get(weekday_key(date), [])
+    return []
+
+def has_date(room_data, date, calendar):
+    """Check whether a recurring room has a schedule entry (possibly empty) for a date."""
+    return date in room_data.get('overrides', {}) or (calendar is not None and calendar.is_class_day(date))
+
+def materialize_date(room_data, date, calendar):
+    """Copy a date's effective time blocks into the room's overrides so they can be changed, and return them."""
+    overrides = room_data.setdefault('overrides', {})
+    if date not in overrides:
+        overrides[date] = copy.deepcopy(events_on_date(room_data, date, calendar))
+    return overrides[date]
+
+def expand_schedule(room_data, calendar):
+    """Return the dated schedule (date -> time blocks) a recurring room represents."""
+    schedule = {}
+    if calendar is not None:
+        for date in calendar.class_days():
+            events = room_data.get('recurrence', {}).get(weekday_key(date), [])
+            if events:
+                schedule[date] = copy.deepcopy(events)
+    for date, events in room_data.get('overrides', {}).items():
+        schedule[date] = copy.deepcopy(events)
+    return dict(sorted(schedule.items()))
+
+def _events_key(events):
+    """Hashable key for comparing lists of time blocks."""
+    return tuple(tuple(sorted(event.items())) for event in events)
+
+def to_recurring(room_data, calendar):
+    """
+    Convert a room with a dated schedule to recurrence rules plus overrides.
+    Each weekday's rule is the list of time blocks shared by most of its class days; every date
+    that differs from its rule is kept as an override, so the conversion is lossless.
+    """
+    schedule = room_data.get('schedule', {})
+    class_days = calendar.class_days()
+
+    recurrence = {}
+    days_by_weekday = {}
+    for date in class_days:
+        days_by_weekday.setdefault(weekday_key(date), []).append(date)
+    for weekday, dates in days_by_weekday.items():
+        counts = Counter(_events_key(schedule.get(date, [])) for date in dates)
+        most_common_key, _ = counts.most_common(1)[0]
+        if most_common_key:
+            rule_date = next(date for date in dates if _events_key(schedule.get(date, [])) == most_common_key)
+            recurrence[weekday] = copy.deepcopy(schedule[rule_date])
+
+    overrides = {}
+    for date in class_days:
+        events = schedule.get(date, [])
+        if _events_key(events) != _events_key(recurrence.get(weekday_key(date), [])):
+            overrides[date] = copy.deepcopy(events)
+    for date, events in schedule.items():
+        if not calendar.is_class_day(date) and events:
+            overrides[date] = copy.deepcopy(events)
+
+    converted = {key: value for key, value in room_data.items() if key not in ('_id', 'schedule')}
+    converted['recurrence'] = recurrence
+    converted['overrides'] = dict(sorted(overrides.items()))
+    return converted
@@ -0,0 +1,189 @@
+# Written by Colby
+# Memory-mapped availability snapshots shared by every worker process on a host
+
+import json
+import mmap
+import os
+import time
+from contextlib import contextmanager
+import numpy as np
+from occupancy import OccupancySearch, ROW_BYTES, pack_events
+
+try:
+    import fcntl
+except ImportError: # Windows: builds are not serialized across processes
+    fcntl = None
+
+# File layout:
+# - MAGIC, then the header length as an 8-byte little-endian integer
+# - a JSON header: {generation, sources, rooms: [[building, room, location], ...], dates: [...], data_offset}
+# - for each date in header order, a (rooms x ROW_BYTES) array of occupancy bits, one bit per minute
+# Snapshots are replaced by writing a new file and renaming it over the old one, so workers that still map
+# the old file keep a consistent view until they notice the new generation.
+MAGIC = b"RFSNAP01"
+ALIGNMENT = 64
+
+def read_generation(path):
+    """Return the generation of the snapshot at path, or 0 if there is none."""
+    try:
+        with open(path, "rb") as f:
+            return _read_header(f)['generation']
+    except (OSError, ValueError):
+        return 0
+
+def _read_header(f):
+    """Read and parse a snapshot header from the start of an open file."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not an availability snapshot")
+    header_length = int.from_bytes(f.read(8), "little")
+    return json.loads(f.read(header_length))
+
+def write_snapshot(path, rooms, dates=None, sources=None, generation=None):
+    """
+    Write an availability snapshot of rooms in the dated schedule layout and atomically replace the file at path.
+    Dates default to every date in the rooms' schedules. Returns the new generation.
+    """
+    rooms = list(rooms)
+    if dates is None:
+        dates = {date for room_data in rooms for date in room_data.get('schedule', {})}
+    dates = sorted(dates)
+    if generation is None:
+        generation = read_generation(path) + 1
+
+    header = {
+        "generation": generation,
+        "sources": sources or {},
+        "rooms": [[room_data['building'], room_data['room'], room_data.get('location')] for room_data in rooms],
+        "dates": dates,
+    }
+    # The data offset is part of the header, so leave room for its digits before aligning it
+    header["data_offset"] = 0
+    prefix_length = len(MAGIC) + 8 + len(json.dumps(header).encode()) + 20
+    header["data_offset"] = -(-prefix_length // ALIGNMENT) * ALIGNMENT
+    encoded = json.dumps(header).encode()
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        f.write(b"\0" * (header["data_offset"] - f.tell()))
+        # One date at a time, so building the snapshot never holds more than a day of bits
+        for date in dates:
+            day = np.zeros((len(rooms), ROW_BYTES), dtype=np.uint8)
+            for row, room_data in enumerate(rooms):
+                events = room_data.get('schedule', {}).get(date)
+                if events:
+                    day[row] = pack_events(events)
+            f.write(day.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return generation
+
+@contextmanager
+def _file_lock(path, exclusive):
+    """Hold the snapshot's lock file: exclusively while a snapshot is built, shared while a row is written."""
+    lock_file = open(f"{path}.lock", "a")
+    try:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+def open_or_build(path, build, is_current=None, check_interval=30):
+    """
+    Map the snapshot at path, calling build() to write it first if it is missing or not is_current(snapshot).
+    Only one process builds at a time; the others wait for it and map its result.
+    """
+    with _file_lock(path, exclusive=True):
+        snapshot = AvailabilitySnapshot(path, check_interval) if os.path.exists(path) else None
+        if snapshot is None or (is_current and not is_current(snapshot)):
+            if snapshot is not None:
+                snapshot.close()
+            build()
+            snapshot = AvailabilitySnapshot(path, check_interval)
+        return snapshot
+
+class AvailabilitySnapshot(OccupancySearch):
+    """
+    Read-only view of a snapshot file searched like an OccupancyIndex. Every worker maps the
+    same file, so the occupancy bits live once in the page cache no matter how many workers there are.
+    Single rows are patched with positioned writes to the file, which all mappings see immediately, and
+    a newer generation written by write_snapshot is picked up by refreshed().
+    """
+    def __init__(self, path, check_interval=30):
+        super().__init__()
+        self.path = path
+        self.check_interval = check_interval
+        self._checked_at = 0
+        self._map()
+
+    def _map(self):
+        """Map the file currently at path and index its header."""
+        with open(self.path, "rb") as f:
+            header = _read_header(f)
+            self._inode = os.fstat(f.fileno()).st_ino
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.generation = header['generation']
+        self.sources = header['sources']
+        self.dates = {date: i for i, date in enumerate(header['dates'])}
+        self.data_offset = header['data_offset']
+        self.rooms, self.rows, self.building_rows = [], {}, {}
+        for row, (building, room, location) in enumerate(header['rooms']):
+            self.rooms.append({"building": building, "room": room, "location": location})
+            self.rows[(building, room)] = row
+            self.building_rows.setdefault(building, []).append(row)
+        day_size = len(self.rooms) * ROW_BYTES
+        self.days = {
+            date: np.frombuffer(self._mapping, dtype=np.uint8, count=day_size,
+                                offset=self.data_offset + i * day_size).reshape(len(self.rooms), ROW_BYTES)
+            for date, i in self.dates.items()
+        }
+
+    def close(self):
+        # Drop the array views first, since a mapping with live views can't be closed
+        self.days = {}
+        try:
+            self._mapping.close()
+        except BufferError:
+            pass # a caller still holds a view; the mapping is released with it
+
+    def refreshed(self, force=False):
+        """
+        Return a snapshot of the file now at path if it was replaced, or this one, checking at most every
+        check_interval seconds unless forced. Searches in flight keep using the old mapping, which is released with them.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return self
+        self._checked_at = now
+        try:
+            if os.stat(self.path).st_ino == self._inode:
+                return self
+            return AvailabilitySnapshot(self.path, self.check_interval)
+        except (OSError, ValueError) as e:
+            print(f"Keeping availability snapshot generation {self.generation}: {e}")
+            return self
+
+    def day(self, date):
+        return self.days[date]
+
+    def write_room(self, building, room, date, events):
+        """
+        Overwrite a room's row for a date in the file. Returns False if the snapshot doesn't cover it or the file
+        was replaced by a newer generation. Writes wait for a build in progress (see open_or_build), so a write that
+        the build may not have read is never applied to the file that is about to be replaced.
+        """
+        row = self.rows.get((building, room))
+        if row is None or date not in self.dates:
+            return False
+        with _file_lock(self.path, exclusive=False), open(self.path, "r+b") as f:
+            if os.fstat(f.fileno()).st_ino != self._inode:
+                return False # the file was replaced by a newer generation
+            f.seek(self.data_offset + (self.dates[date] * len(self.rooms) + row) * ROW_BYTES)
+            f.write(pack_events(events).tobytes())
+        return True
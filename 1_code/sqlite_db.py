@@ -0,0 +1,297 @@
+# Written by Colby
+
+from db_interface import DatabaseInterface
+from util import to_minutes, to_time_str, find_free_minutes, first_free_range, format_time_range, event_minutes
+from contextlib import contextmanager
+import sqlite3
+import threading
+import os
+
+# Path of the SQLite database file
+SQLITE_PATH = os.getenv("SQLITE_PATH", "roomfinder.db")
+
+# Embedded SQLite backend for UTD Room Finder, for running without a MongoDB server
+
+# Schema:
+# - rooms: one row per (building, room)
+# - events: one row per time block, keyed to its room and date with the parsed start and end minutes,
+#   indexed on (date, room_id, start_min) so a date's events can be read per room in time order
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    id INTEGER PRIMARY KEY,
+    building TEXT NOT NULL,
+    room TEXT NOT NULL,
+    location TEXT,
+    UNIQUE (building, room)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    room_id INTEGER NOT NULL REFERENCES rooms(id) ON DELETE CASCADE,
+    date TEXT NOT NULL,
+    start_min INTEGER NOT NULL,
+    end_min INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    status TEXT NOT NULL,
+    event_title TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS events_date_room ON events (date, room_id, start_min);
+CREATE INDEX IF NOT EXISTS events_room_date ON events (room_id, date);
+"""
+
+EVENT_COLUMNS = "start_time, end_time, start_min, end_min, status, event_title, notes"
+
+def _event(row):
+    """Convert an events row to a schedule event."""
+    return {
+        "start_time": row['start_time'],
+        "end_time": row['end_time'],
+        "start_min": row['start_min'],
+        "end_min": row['end_min'],
+        "status": row['status'],
+        "event_title": row['event_title'],
+        "notes": row['notes']
+    }
+
+class SQLiteDatabase(DatabaseInterface):
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local() # one connection per thread
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode, so writes can take the write lock up front with BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA foreign_keys = ON")
+            self._local.connection = connection
+        return connection
+
+    def initialize_db(self):
+        """Open the database file and create the schema if needed."""
+        try:
+            connection = self.connection
+            connection.execute("PRAGMA journal_mode = WAL") # readers don't block the writer
+            connection.executescript(SCHEMA)
+            print(f"Opened SQLite database {self.path}")
+            return True
+        except sqlite3.Error as e:
+            print(f"SQLite initialization failed: {e}")
+            return False
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block of statements in one transaction, taking the write lock up front."""
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def load_rooms(self, rooms):
+        """Replace all rooms and events with a list of room documents in the dated schedule layout."""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM events")
+            connection.execute("DELETE FROM rooms")
+            for room_data in rooms:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO rooms (building, room, location) VALUES (?, ?, ?)",
+                    (room_data['building'], room_data['room'], room_data.get('location')))
+                if not cursor.rowcount:
+                    continue # keep the first copy of a duplicated room
+                connection.executemany(
+                    f"INSERT INTO events (room_id, date, {EVENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, date, event['start_time'], event['end_time'], *event_minutes(event),
+                      event['status'], event.get('event_title', ""), event.get('notes', ""))
+                     for date, events in room_data.get('schedule', {}).items() for event in events])
+        self.catalog_generation += 1
+        return True
+
+    def _room_id(self, building, room):
+        """Return a room's row id, or None if it doesn't exist."""
+        row = self.connection.execute(
+            "SELECT id FROM rooms WHERE building = ? AND room = ?", (building, room)).fetchone()
+        return row['id'] if row else None
+
+    def get_room(self, building, room):
+        """Return a specific room by building and room number."""
+        row = self.connection.execute(
+            "SELECT id, building, room, location FROM rooms WHERE building = ? AND room = ?", (building, room)).fetchone()
+        if row is None:
+            return None
+        room_data = {"building": row['building'], "room": row['room'], "schedule": {}}
+        if row['location']:
+            room_data['location'] = row['location']
+        for event in self.connection.execute(
+                f"SELECT date, {EVENT_COLUMNS} FROM events WHERE room_id = ? ORDER BY date, start_min, id", (row['id'],)):
+            room_data['schedule'].setdefault(event['date'], []).append(_event(event))
+        return room_data
+
+    def get_date_range(self):
+        """Return the first and last date with events, or None if there are none."""
+        row = self.connection.execute("SELECT MIN(date) AS first, MAX(date) AS last FROM events").fetchone()
+        if row['first'] is None:
+            return None
+        return row['first'], row['last']
+
+    def get_buildings(self):
+        """Return a sorted list of unique buildings."""
+        return [row['building'] for row in self.connection.execute("SELECT DISTINCT building FROM rooms ORDER BY building")]
+
+    def get_rooms_by_building(self):
+        """Return a dictionary mapping buildings to their room numbers."""
+        rooms_by_building = {}
+        for row in self.connection.execute("SELECT building, room FROM rooms ORDER BY id"):
+            rooms_by_building.setdefault(row['building'], []).append(row['room'])
+        return rooms_by_building
+
+    def add_event(self, building, room, date, start_time, end_time, event_title="", notes="", status="User Reported"):
+        """Add an event to the room's schedule for the specified date, creating the room if needed."""
+        start_minutes = to_minutes(start_time)
+        end_minutes = to_minutes(end_time)
+        if start_minutes >= end_minutes:
+            return "Start time must be before end time"
+
+        # Take the write lock before checking for overlaps, so concurrent reports can't both pass the check
+        with self._transaction() as connection:
+            cursor = connection.execute("INSERT OR IGNORE INTO rooms (building, room) VALUES (?, ?)", (building, room))
+            new_room = bool(cursor.rowcount)
+            room_id = self._room_id(building, room)
+            overlap = connection.execute(
+                "SELECT 1 FROM events WHERE date = ? AND room_id = ? AND status != 'Cancelled' AND start_min < ? AND end_min > ? LIMIT 1",
+                (date, room_id, end_minutes, start_minutes)).fetchone()
+            if overlap:
+                return "Event overlaps with an existing event"
+            connection.execute(
+                f"INSERT INTO events (room_id, date, {EVENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (room_id, date, to_time_str(start_minutes), to_time_str(end_minutes), start_minutes, end_minutes,
+                 status, event_title, notes))
+        if new_room:
+            self.catalog_generation += 1
+        return True
+
+    def _write(self, sql, params):
+        """Run a single-statement write and return whether it changed any rows."""
+        with self._transaction() as connection:
+            return connection.execute(sql, params).rowcount > 0
+
+    def remove_user_event(self, building, room, date, start_time, end_time):
+        """Remove a user-reported event from the room's schedule for the specified date and time block."""
+        return self._write(
+            "DELETE FROM events WHERE room_id = (SELECT id FROM rooms WHERE building = ? AND room = ?)"
+            " AND date = ? AND start_time = ? AND end_time = ? AND status = 'User Reported'",
+            (building, room, date, start_time, end_time))
+
+    def _set_status(self, building, room, date, start_time, end_time, old_status, new_status, notes):
+        """Change the status and notes of the first event in a time block with the given status."""
+        return self._write(
+            "UPDATE events SET status = ?, notes = ? WHERE id = ("
+            "SELECT id FROM events WHERE room_id = (SELECT id FROM rooms WHERE building = ? AND room = ?)"
+            " AND date = ? AND start_time = ? AND end_time = ? AND status = ? ORDER BY start_min, id LIMIT 1)",
+            (new_status, notes, building, room, date, start_time, end_time, old_status))
+
+    def cancel_event(self, building, room, date, start_time, end_time, notes=""):
+        """Mark an event as cancelled in the room's schedule for the specified date and time block."""
+        base_message = "User reported event as cancelled."
+        notes = base_message if not notes else f"{base_message} Explanation: {notes}"
+        return self._set_status(building, room, date, start_time, end_time, "Scheduled", "Cancelled", notes)
+
+    def uncancel_event(self, building, room, date, start_time, end_time, notes=""):
+        """Mark a cancelled event as scheduled again in the room's schedule for the specified date and time block."""
+        base_message = "User Confirmed."
+        notes = base_message if not notes else f"{base_message} Explanation: {notes}"
+        return self._set_status(building, room, date, start_time, end_time, "Cancelled", "Scheduled", notes)
+
+    def _search(self, building, room, date, start_time, end_time, min_duration, limit):
+        """Return (room row, (start, end) minutes) pairs for matching rooms with a sufficient gap on a date."""
+        start_minutes = to_minutes(start_time)
+        end_minutes = to_minutes(end_time)
+        filters, params = [], [date, end_minutes, start_minutes]
+        if building != None:
+            filters.append("rooms.building = ?")
+            params.append(building)
+        if room != None:
+            filters.append("rooms.room = ?")
+            params.append(room)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        # One query returns every matching room with its blocking events inside the window, in room order
+        rows = self.connection.execute(
+            "SELECT rooms.id, rooms.building, rooms.room, rooms.location, events.start_min, events.end_min FROM rooms"
+            " LEFT JOIN events ON events.room_id = rooms.id AND events.date = ? AND events.status != 'Cancelled'"
+            " AND events.start_min < ? AND events.end_min > ?"
+            f" {where} ORDER BY rooms.id, events.start_min", params)
+
+        results = []
+        current, busy = None, []
+        for row in rows:
+            if current is not None and row['id'] != current['id']:
+                slot = self._first_slot(busy, start_minutes, end_minutes, min_duration)
+                if slot:
+                    results.append((current, slot))
+                    if len(results) >= limit:
+                        return results
+                busy = []
+            current = row
+            if row['start_min'] is not None:
+                busy.append({"start_min": row['start_min'], "end_min": row['end_min'], "status": "Scheduled"})
+        if current is not None and len(results) < limit:
+            slot = self._first_slot(busy, start_minutes, end_minutes, min_duration)
+            if slot:
+                results.append((current, slot))
+        return results
+
+    def _first_slot(self, busy, start_minutes, end_minutes, min_duration):
+        """Return the first free (start, end) minute range around the busy events lasting at least min_duration minutes."""
+        return first_free_range(find_free_minutes(busy, start_minutes, end_minutes), min_duration)
+
+    def get_next_availability_on_date(self, building, room, date, start_time="00:00", end_time="23:59", min_duration=1):
+        """
+        Find the next available time slot on the specified date that meets the criteria.
+        Returns the time slot as a string (e.g., "10:00 - 12:00") or None if no slot is available.
+        """
+        min_duration = int(min_duration) if min_duration else 1
+        results = self._search(building, room, date, start_time, end_time, min_duration, limit=1)
+        if results:
+            return format_time_range(results[0][1])
+        if self._room_id(building, room) is None:
+            # A room without a schedule is free for the whole window
+            slot = first_free_range([(to_minutes(start_time), to_minutes(end_time))], min_duration)
+            return format_time_range(slot) if slot else None
+        return None
+
+    def get_rooms_with_sufficient_gap(self, building, room, date, start_time, end_time, min_duration, limit=50):
+        """Return a list of rooms in the specified building with at least one gap of min_duration minutes."""
+        start_time = start_time or "00:00"
+        end_time = end_time or "23:59"
+        min_duration = int(min_duration) if min_duration else 1
+        return [{
+            "building": row['building'],
+            "room": row['room'],
+            "location": row['location']
+        } for row, _ in self._search(building, room, date, start_time, end_time, min_duration, limit)]
+
+    def get_rooms_with_next_availability(self, building, room, date, start_time, end_time, min_duration, limit=50):
+        """Return rooms with a sufficient gap together with their first qualifying (start, end) minutes, in a single pass."""
+        start_time = start_time or "00:00"
+        end_time = end_time or "23:59"
+        min_duration = int(min_duration) if min_duration else 1
+        return [{
+            "building": row['building'],
+            "room": row['room'],
+            "location": row['location'],
+            "next_availability": slot
+        } for row, slot in self._search(building, room, date, start_time, end_time, min_duration, limit)]
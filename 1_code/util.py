@@ -11,4 +11,73 @@ def to_time_str(minutes):
     """Convert minutes since midnight to a time string (HH:MM)."""
     hours = minutes // 60
     minutes = minutes % 60
-    return time(hours, minutes).strftime("%H:%M")
\ No newline at end of file
+    return time(hours, minutes).strftime("%H:%M")
+
+def format_time_range(time_range):
+    """Format a (start, end) pair of minutes as "HH:MM - HH:MM"."""
+    return f"{to_time_str(time_range[0])} - {to_time_str(time_range[1])}"
+
+def make_event(start_time, end_time, status, event_title="", notes=""):
+    """Build a schedule event, storing the parsed start and end minutes alongside the time strings."""
+    return {
+        "start_time": start_time,
+        "end_time": end_time,
+        "start_min": to_minutes(start_time),
+        "end_min": to_minutes(end_time),
+        "status": status,
+        "event_title": event_title,
+        "notes": notes
+    }
+
+def event_minutes(event):
+    """Return an event's (start, end) minutes, parsing the time strings only for events stored without them."""
+    start_min = event.get('start_min')
+    end_min = event.get('end_min')
+    if start_min is None or end_min is None:
+        return to_minutes(event['start_time']), to_minutes(event['end_time'])
+    return start_min, end_min
+
+def find_free_minutes(events, start_minutes, end_minutes):
+    """Find all free (start, end) minute ranges between start_minutes and end_minutes given a day's list of events."""
+    # Get (start, end) minutes of the day's events, excluding cancelled ones, sorted by start time
+    busy = sorted(event_minutes(event) for event in events if event['status'] != "Cancelled")
+
+    free_ranges = []
+    current_time = start_minutes
+
+    # Check gaps between events
+    for event_start, event_end in busy:
+        # Skip events that end before the start time or start after the end time
+        if event_end <= start_minutes or event_start >= end_minutes:
+            continue
+
+        # If there's a gap before this event starts
+        if current_time < event_start and event_start <= end_minutes:
+            slot_start = max(current_time, start_minutes)
+            slot_end = event_start
+            if slot_start < slot_end:
+                free_ranges.append((slot_start, slot_end))
+
+        # Move the current time to the end of this event
+        current_time = max(current_time, event_end)
+
+    # Check for a gap after the last event
+    if current_time < end_minutes:
+        free_ranges.append((current_time, end_minutes))
+
+    return free_ranges
+
+def first_free_range(free_ranges, min_duration):
+    """Return the first (start, end) minute range lasting at least min_duration minutes, or None."""
+    for range_start, range_end in free_ranges:
+        if range_end - range_start >= min_duration:
+            return range_start, range_end
+    return None
+
+def compute_available_slots(events, start_time="00:00", end_time="23:59"):
+    """Find all available time slots between start_time and end_time given a day's list of events."""
+    if not events:
+        # If no events, the entire time range is available
+        return [(start_time, end_time)]
+    free_ranges = find_free_minutes(events, to_minutes(start_time), to_minutes(end_time))
+    return [(to_time_str(slot_start), to_time_str(slot_end)) for slot_start, slot_end in free_ranges]
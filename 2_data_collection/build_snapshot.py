@@ -0,0 +1,21 @@
+# Written by Colby
+
+import sys
+from mongodb import MongoDatabase
+from snapshot import open_or_build
+
+'''
+Writes a new generation of the availability snapshot used by MONGO_SEARCH_MODE=snapshot, from every served semester.
+Run it after a semester is rebuilt, promoted or updated with --incremental; running workers switch to the new file within ALIAS_CHECK_INTERVAL seconds.
+
+Usage: python build_snapshot.py [snapshot file]
+'''
+
+if __name__ == "__main__":
+    database = MongoDatabase()
+    database.search_mode = "python" # write the snapshot without mapping the current one
+    if len(sys.argv) > 1:
+        database.snapshot_path = sys.argv[1]
+    database.initialize_db()
+    # Build under the snapshot lock, so reports from running workers wait for the new file instead of being lost
+    open_or_build(database.snapshot_path, database.rebuild_snapshot, lambda snapshot: False).close()
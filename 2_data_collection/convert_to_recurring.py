@@ -0,0 +1,44 @@
+# Written by Colby
+
+import sys
+from mongodb import get_db, resolve_collection, create_room_index
+from recurrence import SEMESTERS_COLLECTION, to_recurring
+from initialize_semester import SEMESTER_COLLECTION, get_semester_calendar
+
+'''
+Copies a semester collection with a dated schedule into a new collection that stores each room
+as weekly recurrence rules plus per-date overrides (see recurrence.py), and records the semester
+calendar the rules are resolved against. The source collection is left untouched.
+Point the app at the new collection with SCHEDULE_LAYOUT=recurring.
+
+Usage: python convert_to_recurring.py [source collection] [target collection]
+'''
+
+BATCH_SIZE = 500
+
+def convert_collection(source_collection, target_collection, calendar):
+    converted = 0
+    batch = []
+    for room_data in source_collection.find({}, {"_id": 0}):
+        batch.append(to_recurring(room_data, calendar))
+        if len(batch) >= BATCH_SIZE:
+            target_collection.insert_many(batch, ordered=False)
+            converted += len(batch)
+            batch = []
+    if batch:
+        target_collection.insert_many(batch, ordered=False)
+        converted += len(batch)
+    create_room_index(target_collection)
+    return converted
+
+if __name__ == "__main__":
+    source_name = sys.argv[1] if len(sys.argv) > 1 else SEMESTER_COLLECTION
+    target_name = sys.argv[2] if len(sys.argv) > 2 else source_name + "_recurring"
+    db = get_db()
+    calendar = get_semester_calendar()
+
+    # Clear existing data if rerunning
+    db[target_name].drop()
+    converted = convert_collection(db[resolve_collection(db, source_name)], db[target_name], calendar)
+    db[SEMESTERS_COLLECTION].replace_one({"collection": target_name}, calendar.to_document(target_name, layout="recurring"), upsert=True)
+    print(f"Converted {converted} rooms from '{source_name}' into '{target_name}'")
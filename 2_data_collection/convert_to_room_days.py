@@ -0,0 +1,53 @@
+# Written by Colby
+
+import sys
+from mongodb import get_db, resolve_collection, room_day_docs, create_room_day_indexes, DAYS_SUFFIX
+from recurrence import SEMESTERS_COLLECTION
+from initialize_semester import SEMESTER_COLLECTION
+
+'''
+Copies a semester collection with a dated schedule into the room_day layout: a collection of room headers
+(building, room, location) plus a "<target>_days" collection with one document per room and date.
+The semester's registry entry is copied to the target name. The source collection is left untouched.
+Point the app at the new collection with SCHEDULE_LAYOUT=room_day.
+
+Usage: python convert_to_room_days.py [source collection] [target collection]
+'''
+
+BATCH_SIZE = 500 # rooms per batch
+
+def convert_collection(source_collection, target_collection, day_collection):
+    converted = 0
+    headers, days = [], []
+    for room_data in source_collection.find({}, {"_id": 0}):
+        header, room_days = room_day_docs(room_data)
+        headers.append(header)
+        days.extend(room_days)
+        if len(headers) >= BATCH_SIZE:
+            converted += _insert_batch(target_collection, day_collection, headers, days)
+            headers, days = [], []
+    if headers:
+        converted += _insert_batch(target_collection, day_collection, headers, days)
+    create_room_day_indexes(target_collection, day_collection)
+    return converted
+
+def _insert_batch(target_collection, day_collection, headers, days):
+    target_collection.insert_many(headers, ordered=False)
+    if days:
+        day_collection.insert_many(days, ordered=False)
+    return len(headers)
+
+if __name__ == "__main__":
+    source_name = sys.argv[1] if len(sys.argv) > 1 else SEMESTER_COLLECTION
+    target_name = sys.argv[2] if len(sys.argv) > 2 else source_name + "_room_days"
+    db = get_db()
+
+    # Clear existing data if rerunning
+    db.drop_collection(target_name)
+    db.drop_collection(target_name + DAYS_SUFFIX)
+    converted = convert_collection(db[resolve_collection(db, source_name)], db[target_name], db[target_name + DAYS_SUFFIX])
+
+    calendar = db[SEMESTERS_COLLECTION].find_one({"collection": source_name}, {"_id": 0})
+    if calendar:
+        db[SEMESTERS_COLLECTION].replace_one({"collection": target_name}, dict(calendar, collection=target_name, layout="room_day"), upsert=True)
+    print(f"Converted {converted} rooms from '{source_name}' into '{target_name}' and '{target_name + DAYS_SUFFIX}'")
@@ -1,7 +1,15 @@
 # Written by Colby
 
-from mongodb import get_db
+from mongodb import get_db, build_free_intervals, free_interval_docs, resolve_collection, promote_collection, create_room_index, \
+    bump_collection_version, SEMESTER_COLLECTION, FREE_INTERVALS_SUFFIX, FREE_COVERAGE_ID, ALIAS_CHECK_INTERVAL
+from util import make_event, event_minutes
+from recurrence import SemesterCalendar, SEMESTERS_COLLECTION
 from datetime import datetime, timedelta
+from pymongo import UpdateOne, DeleteMany, InsertOne
+from pymongo.errors import BulkWriteError
+import argparse
+import json
+import time
 
 '''
 Each semester, we will scrape the course catalog for class information.
@@ -25,21 +33,34 @@ New Schema:
     - Time Block (dict): Represents a scheduled event
       - start_time (str): Start time in 24-hour format (e.g., "09:00")
       - end_time (str): End time in 24-hour format (e.g., "11:00")
+      - start_min (int): Start time in minutes since midnight (e.g., 540)
+      - end_min (int): End time in minutes since midnight (e.g., 660)
       - status (str): "Scheduled", "Cancelled", or "User Reported"
       - event_title (str): Event name (e.g., "ENGL 1301")
       - notes (str): Additional notes about the event or cancellation
 
+A companion collection (e.g., "2025_Spring_free") holds the free intervals of every room on every
+day of the semester, so availability searches can be answered with a single indexed range query:
+- building, room, date
+- start_min, end_min (int): Minutes since midnight
+- length (int): end_min - start_min
+
 Steps: 
-1. Create a new collection in the database for the semester
+1. Create a new staging collection in the database for the semester (e.g., "2025_Spring_20250115093000")
 2. Manually set the semester start and end dates as well as holidays
-3. For each class,
-    - Initialize the room if it doesn't exist
-    - Add all class times to that room's schedule
+3. Group the classes by room in memory, merging all class times into each room's schedule
+4. Write the rooms with batched bulk writes
+5. Materialize the free intervals of every room for every day of the semester
+6. Promote the staging collection by pointing the semester's alias at it (see mongodb.py).
+   Running apps switch to it within ALIAS_CHECK_INTERVAL seconds, after which the previous collection is dropped.
+
+With --incremental, the existing collection is kept and only the rooms and dates whose classes changed
+are rewritten. User reports, cancellation status and notes, and room metadata (e.g. location links) are preserved.
 '''
 
 # Adjust the following for the current semester (see https://www.utdallas.edu/academics/calendar/)
 CLASS_INFO_COLLECTION = "class_information" # collection with scraped data
-SEMESTER_COLLECTION = "2025_Spring" # name for the new collection
+# The semester name (SEMESTER_COLLECTION environment variable, e.g. "2025_Spring") is shared with the app in mongodb.py
 CLASSES_START = datetime(2025, 1, 21)
 CLASSES_END = datetime(2025, 5, 9)
 HOLIDAYS = [
@@ -51,6 +72,8 @@ HOLIDAYS = [
     datetime(2025, 3, 21)
 ]
 
+BATCH_SIZE = 1000 # rooms per bulk write
+
 # Map weekdays to corresponding index for datetime weekday() function
 WEEKDAY_KEYS = [
     ("monday_times", 0),
@@ -60,6 +83,11 @@ WEEKDAY_KEYS = [
     ("friday_times", 4)
 ]
 
+def get_semester_calendar():
+    """Return the configured class days as a SemesterCalendar."""
+    return SemesterCalendar(CLASSES_START.strftime("%Y-%m-%d"), CLASSES_END.strftime("%Y-%m-%d"),
+                            [holiday.strftime("%Y-%m-%d") for holiday in HOLIDAYS])
+
 # Get start and end time from a time range string (e.g., "14:30 - 15:45")
 def parse_time_range(time_str):
     try:
@@ -78,28 +106,25 @@ def parse_room_location(room_location):
         print(f"Unexpected room location format: {room_location}")
         return None, None
 
-# Get all days of a specific weekday in the semester
-def get_weekday_dates(weekday_index):
+# Get all days of a specific weekday in the semester (the configured semester unless a SemesterCalendar is given)
+def get_weekday_dates(weekday_index, calendar=None):
+    calendar = calendar or get_semester_calendar()
     days = []
-    for day_offset in range((CLASSES_END - CLASSES_START).days + 1):
-        current_date = CLASSES_START + timedelta(days=day_offset)
-        if current_date.weekday() == weekday_index and current_date not in HOLIDAYS:
+    for date_str in calendar.class_days():
+        current_date = datetime.strptime(date_str, "%Y-%m-%d")
+        if current_date.weekday() == weekday_index:
             days.append(current_date)
     return days
 
-# Transform and insert room data into the semester collection as events
-def process_record(record, semester_collection):
-    # Extract room and building
-    if "room_location" not in record:
-        print(f"No room_location field in record: {record.get('_id')}")
-        return
-    building, room = parse_room_location(record["room_location"])
-    if not building or not room:
-        return
-
-    # Initialize room data if not exists
-    room_schedule = {}
-    
+# Map each weekday index to its "YYYY-MM-DD" dates in the semester, computed once per build
+def semester_weekday_dates(calendar=None):
+    return {day_index: [date.strftime("%Y-%m-%d") for date in get_weekday_dates(day_index, calendar)]
+            for _, day_index in WEEKDAY_KEYS}
+
+# Get a class record's time blocks as (date, event) pairs
+def record_events(record, weekday_dates=None):
+    weekday_dates = weekday_dates or semester_weekday_dates()
+    events = []
     # Iterate through each weekday
     for weekday_field, day_index in WEEKDAY_KEYS:
         time_strs = record.get(weekday_field, []) # array of time range strings
@@ -112,59 +137,245 @@ def process_record(record, semester_collection):
                 times.append((start_time, end_time))
 
         # Iterate through all days in the semester of that weekday
-        weekday_dates = get_weekday_dates(day_index)
-
-        for curr_date in weekday_dates:
-            date_str = curr_date.strftime("%Y-%m-%d")
-            if date_str not in room_schedule:
-                room_schedule[date_str] = []
+        for date_str in weekday_dates[day_index]:
             for start_time, end_time in times:
-                event = {
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "status": "Scheduled", # all classes are initially marked as scheduled
-                    "event_title": record.get("event_title", ""),
-                    "notes": ""
-                }
-                room_schedule[date_str].append(event)
-    
-    # Update the room's schedule in the database
-    try:
-        semester_collection.update_one(
-                {"building": building, "room": room},
-                {"$set": {"schedule": room_schedule}},
-                upsert=True  # create room if doesn't exist
-            )
-    except Exception as e:
-        print(f"Error updating room {building}.{room}: {str(e)}")
-
-def create_semester_schedule(class_info_collection, semester_collection):
-    total_records = class_info_collection.count_documents({})
-    print(f"Processing {total_records} class records")
-    
+                # all classes are initially marked as scheduled
+                events.append((date_str, make_event(start_time, end_time, "Scheduled", record.get("event_title", ""))))
+    return events
+
+# Group every class record by room and merge their events into one schedule per room
+def build_room_schedules(records, calendar=None):
+    weekday_dates = semester_weekday_dates(calendar)
+    room_schedules = {}  # (building, room) -> schedule
     processed = 0
-    next_milestone = 10 
-    for record in class_info_collection.find():
-        process_record(record, semester_collection)
+    for record in records:
         processed += 1
+        # Extract room and building
+        if "room_location" not in record:
+            print(f"No room_location field in record: {record.get('_id')}")
+            continue
+        building, room = parse_room_location(record["room_location"])
+        if not building or not room:
+            continue
+        room_schedule = room_schedules.setdefault((building, room), {})
+        for date_str, event in record_events(record, weekday_dates):
+            room_schedule.setdefault(date_str, []).append(event)
+
+    # Sort each day's time blocks by start time
+    for room_schedule in room_schedules.values():
+        for events in room_schedule.values():
+            events.sort(key=lambda event: event["start_min"])
+    print(f"Grouped {processed} class records into {len(room_schedules)} rooms")
+    return room_schedules
+
+# Insert the room documents into a new collection with batched, unordered bulk writes.
+# Every room is inserted once, so there is nothing to match against and no per-room index lookup.
+def write_room_schedules(room_schedules, semester_collection, batch_size=BATCH_SIZE):
+    written = 0
+    batch = []
+    for (building, room), room_schedule in room_schedules.items():
+        batch.append(InsertOne({"building": building, "room": room, "schedule": room_schedule}))
+        if len(batch) >= batch_size:
+            written += _write_batch(semester_collection, batch)
+            batch = []
+    if batch:
+        written += _write_batch(semester_collection, batch)
+    print(f"Wrote {written} rooms")
+    return written
+
+def _write_batch(semester_collection, batch):
+    try:
+        result = semester_collection.bulk_write(batch, ordered=False)
+        return result.inserted_count
+    except BulkWriteError as e:
+        # Unordered writes continue past failures; report them and count the rest
+        print(f"Error writing {len(e.details['writeErrors'])} rooms: {e.details['writeErrors'][0]['errmsg']}")
+        return e.details['nInserted']
+
+# Write the room documents to a local JSON file instead of the database
+def write_dry_run(room_schedules, path):
+    rooms = [{"building": building, "room": room, "schedule": room_schedule}
+             for (building, room), room_schedule in room_schedules.items()]
+    with open(path, "w") as f:
+        json.dump(rooms, f)
+    print(f"Wrote {len(rooms)} rooms to {path}")
+    return len(rooms)
 
-        # Log progress
-        progress_percent = (processed / total_records) * 100
-        if progress_percent >= next_milestone and progress_percent < 100:
-            print(f"Processed {processed}/{total_records} records ({progress_percent:.1f}%)")
-            next_milestone += 10
-    print(f"Completed processing {processed} records")
+# Key identifying a class time block across rebuilds
+def class_key(event):
+    return (*event_minutes(event), event.get("event_title", ""))
+
+# Merge a date's freshly expanded classes into the stored time blocks.
+# Stored blocks for classes that still exist are kept as they are (so cancellations and notes survive),
+# classes that no longer exist are dropped, and user reports are always kept.
+# Returns the new list of time blocks, or None if nothing changed.
+def merge_date(stored_events, fresh_events):
+    stored_classes = [event for event in stored_events if event["status"] != "User Reported"]
+    if sorted(map(class_key, stored_classes)) == sorted(map(class_key, fresh_events)):
+        return None
+    unmatched = {}
+    for event in stored_classes:
+        unmatched.setdefault(class_key(event), []).append(event)
+    events = [unmatched[class_key(event)].pop(0) if unmatched.get(class_key(event)) else event for event in fresh_events]
+    events.extend(event for event in stored_events if event["status"] == "User Reported")
+    events.sort(key=lambda event: event_minutes(event)[0])
+    return events
+
+# Compare the fresh room schedules with the stored rooms and write only the rooms and dates that changed.
+# Returns the changed (building, room, date) triples and the added (building, room) pairs.
+def update_room_schedules(room_schedules, semester_collection, batch_size=BATCH_SIZE):
+    summary = {"rooms added": 0, "rooms changed": 0, "dates changed": 0, "user reports kept": 0}
+    changed_dates = []
+    added_rooms = []
+    batch = []
+    stored_rooms = {(room_data["building"], room_data["room"]): room_data.get("schedule", {})
+                    for room_data in semester_collection.find({}, {"_id": 0, "building": 1, "room": 1, "schedule": 1})}
+
+    for building, room in room_schedules.keys() | stored_rooms.keys():
+        fresh_schedule = room_schedules.get((building, room), {})
+        if (building, room) not in stored_rooms:
+            batch.append(UpdateOne({"building": building, "room": room}, {"$set": {"schedule": fresh_schedule}}, upsert=True))
+            summary["rooms added"] += 1
+            added_rooms.append((building, room))
+            changed_dates.extend((building, room, date) for date in fresh_schedule)
+        else:
+            stored_schedule = stored_rooms[(building, room)]
+            set_fields = {}
+            unset_fields = {}
+            for date in fresh_schedule.keys() | stored_schedule.keys():
+                events = merge_date(stored_schedule.get(date, []), fresh_schedule.get(date, []))
+                if events is None:
+                    continue
+                summary["user reports kept"] += sum(event["status"] == "User Reported" for event in events)
+                if events:
+                    set_fields[f"schedule.{date}"] = events
+                else:
+                    unset_fields[f"schedule.{date}"] = ""
+                changed_dates.append((building, room, date))
+            if not set_fields and not unset_fields:
+                continue
+            update = {}
+            if set_fields:
+                update["$set"] = set_fields
+            if unset_fields:
+                update["$unset"] = unset_fields
+            batch.append(UpdateOne({"building": building, "room": room}, update))
+            summary["rooms changed"] += 1
+            summary["dates changed"] += len(set_fields) + len(unset_fields)
+
+        if len(batch) >= batch_size:
+            semester_collection.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        semester_collection.bulk_write(batch, ordered=False)
+
+    print("Changes: " + ", ".join(f"{count} {change}" for change, count in summary.items()))
+    return changed_dates, added_rooms
+
+# Recompute the free intervals of the changed rooms and dates.
+# Added rooms get intervals for every date the free intervals cover, since a room without documents for a date
+# counts as fully booked.
+def refresh_free_intervals(changed_dates, added_rooms, semester_collection, free_collection, batch_size=BATCH_SIZE):
+    rooms = {}
+    for building, room, date in changed_dates:
+        rooms.setdefault((building, room), set()).add(date)
+    coverage = free_collection.find_one({"_id": FREE_COVERAGE_ID})
+    if coverage and added_rooms:
+        first_day = datetime.strptime(coverage["start_date"], "%Y-%m-%d")
+        num_days = (datetime.strptime(coverage["end_date"], "%Y-%m-%d") - first_day).days + 1
+        covered_dates = [(first_day + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(num_days)]
+        for building, room in added_rooms:
+            rooms.setdefault((building, room), set()).update(covered_dates)
+    batch = []
+    for (building, room), dates in rooms.items():
+        room_data = semester_collection.find_one({"building": building, "room": room}, {"_id": 0, "schedule": 1}) or {}
+        for date in sorted(dates):
+            # Deletes must run before the inserts for the same date, so these batches are ordered
+            batch.append(DeleteMany({"building": building, "room": room, "date": date}))
+            batch.extend(InsertOne(doc) for doc in free_interval_docs(building, room, date, room_data.get("schedule", {}).get(date, [])))
+        if len(batch) >= batch_size:
+            free_collection.bulk_write(batch)
+            batch = []
+    if batch:
+        free_collection.bulk_write(batch)
+    print(f"Refreshed free intervals for {sum(map(len, rooms.values()))} room dates")
+
+def create_semester_schedule(class_info_collection, semester_collection, batch_size=BATCH_SIZE, dry_run_path=None, incremental=False):
+    timings = {}
+    stage_start = time.perf_counter()
+    records = list(class_info_collection.find())
+    timings["read"] = time.perf_counter() - stage_start
+    print(f"Processing {len(records)} class records")
+
+    stage_start = time.perf_counter()
+    room_schedules = build_room_schedules(records)
+    timings["group"] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    changes = None
+    if dry_run_path:
+        write_dry_run(room_schedules, dry_run_path)
+    else:
+        # Create the unique (building, room) index before writing, so duplicates are rejected and the
+        # incremental upserts find their room through the index instead of scanning the collection
+        create_room_index(semester_collection)
+        if incremental:
+            changes = update_room_schedules(room_schedules, semester_collection, batch_size)
+        else:
+            write_room_schedules(room_schedules, semester_collection, batch_size)
+    timings["write"] = time.perf_counter() - stage_start
+
+    print("Stage timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+    return changes
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the day-by-day semester collection from the scraped class information.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rooms per bulk write")
+    parser.add_argument("--dry-run", metavar="PATH", help="write the rooms to a local JSON file instead of the database")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only rewrite the rooms and dates whose classes changed, keeping user reports and room metadata")
+    parser.add_argument("--keep-previous", action="store_true", help="keep the previously served collection after promoting the new one")
+    args = parser.parse_args()
+
     db = get_db()
     class_info_collection = db[CLASS_INFO_COLLECTION]
-    semester_collection = db[SEMESTER_COLLECTION]
+    live_collection = resolve_collection(db, SEMESTER_COLLECTION)
 
-    # Clear existing data if rerunning
-    semester_collection.drop()  # Clear existing data
-    
-    # Transform and insert data
-    create_semester_schedule(class_info_collection, semester_collection)
-    
-    # Index for faster queries
-    semester_collection.create_index([("building", 1), ("room", 1)]) 
+    if args.dry_run:
+        create_semester_schedule(class_info_collection, db[live_collection], dry_run_path=args.dry_run)
+    elif args.incremental:
+        semester_collection = db[live_collection]
+        changed_dates, added_rooms = create_semester_schedule(class_info_collection, semester_collection,
+                                                              batch_size=args.batch_size, incremental=True)
+        refresh_free_intervals(changed_dates, added_rooms, semester_collection, db[live_collection + FREE_INTERVALS_SUFFIX],
+                               args.batch_size)
+        # Mark availability snapshots built from the previous contents as outdated
+        if changed_dates:
+            bump_collection_version(db, SEMESTER_COLLECTION)
+    else:
+        # Build into a staging collection while the live one keeps serving searches
+        staging_name = f"{SEMESTER_COLLECTION}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        semester_collection = db[staging_name]
+
+        # Transform and insert data (the room index is created before the inserts)
+        create_semester_schedule(class_info_collection, semester_collection, batch_size=args.batch_size)
+
+        # Materialize free intervals for availability searches
+        stage_start = time.perf_counter()
+        total_intervals = build_free_intervals(semester_collection, db[staging_name + FREE_INTERVALS_SUFFIX],
+                                               CLASSES_START.strftime("%Y-%m-%d"), CLASSES_END.strftime("%Y-%m-%d"))
+        print(f"Created {total_intervals} free intervals in {time.perf_counter() - stage_start:.2f}s")
+
+        # Promote the new collection, then drop the previous one once every app has switched over
+        previous_name = promote_collection(db, SEMESTER_COLLECTION, staging_name)
+        print(f"Promoted '{staging_name}' to serve '{SEMESTER_COLLECTION}'")
+
+        # Register the semester's dates (used to route searches by date and to resolve recurrence rules)
+        db[SEMESTERS_COLLECTION].replace_one({"collection": SEMESTER_COLLECTION},
+                                             get_semester_calendar().to_document(SEMESTER_COLLECTION), upsert=True)
+
+        if not args.keep_previous and previous_name != staging_name:
+            print(f"Waiting {2 * ALIAS_CHECK_INTERVAL:.0f}s before dropping '{previous_name}'")
+            time.sleep(2 * ALIAS_CHECK_INTERVAL)
+            db.drop_collection(previous_name)
+            db.drop_collection(previous_name + FREE_INTERVALS_SUFFIX)
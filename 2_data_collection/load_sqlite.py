@@ -0,0 +1,26 @@
+# Written by Colby
+
+import sys
+import json
+from sqlite_db import SQLiteDatabase, SQLITE_PATH
+
+'''
+Loads the rooms written by 'initialize_semester.py --dry-run' into an SQLite database file,
+replacing whatever the file held before. Run the app against it with DB_TYPE=sqlite.
+
+Usage: python load_sqlite.py [rooms JSON file] [database file]
+'''
+
+if __name__ == "__main__":
+    rooms_path = sys.argv[1] if len(sys.argv) > 1 else "rooms.json"
+    database_path = sys.argv[2] if len(sys.argv) > 2 else SQLITE_PATH
+
+    with open(rooms_path) as f:
+        rooms = json.load(f)
+
+    database = SQLiteDatabase(database_path)
+    if not database.initialize_db():
+        sys.exit(1)
+    database.load_rooms(rooms)
+    print(f"Loaded {len(rooms)} rooms from {rooms_path} into {database_path}")
+    database.close()
@@ -0,0 +1,46 @@
+# Written by Colby
+
+import sys
+from pymongo import UpdateOne
+from mongodb import MongoDatabase, create_room_index
+from util import event_minutes
+
+'''
+One-shot migration that adds the integer start_min/end_min fields to every event
+of a semester collection created before they were stored, and makes its (building, room) index unique.
+Each room's schedule is rewritten as a whole, so run it while the app is not taking reports.
+
+Usage: python migrate_event_minutes.py [collection name]
+'''
+
+BATCH_SIZE = 500
+
+def migrate_collection(collection):
+    updated = 0
+    bulk_operations = []
+    for room_data in collection.find({}, {"schedule": 1}):
+        changed = False
+        schedule = room_data.get("schedule", {})
+        for events in schedule.values():
+            for event in events:
+                if "start_min" not in event or "end_min" not in event:
+                    event["start_min"], event["end_min"] = event_minutes(event)
+                    changed = True
+        if changed:
+            bulk_operations.append(UpdateOne({"_id": room_data["_id"]}, {"$set": {"schedule": schedule}}))
+        if len(bulk_operations) >= BATCH_SIZE:
+            updated += collection.bulk_write(bulk_operations, ordered=False).modified_count
+            bulk_operations = []
+    if bulk_operations:
+        updated += collection.bulk_write(bulk_operations, ordered=False).modified_count
+    return updated
+
+if __name__ == "__main__":
+    database = MongoDatabase()
+    if len(sys.argv) > 1:
+        database.semester_collection = sys.argv[1]
+    database.initialize_db()
+    updated = migrate_collection(database.collection)
+    print(f"Added start_min/end_min to events in {updated} rooms of '{database.semester_collection}'")
+    create_room_index(database.collection)
+    print("Made the (building, room) index unique")
@@ -0,0 +1,81 @@
+# Written by Colby
+# pytest-benchmark suite for the availability searches, reports and catalog lookups on synthetic campuses
+#
+# Not collected by a plain `pytest` run; run it explicitly (requires pytest-benchmark):
+#   Save a baseline:        pytest benchmark_availability.py --benchmark-save=baseline
+#   Check for regressions:  pytest benchmark_availability.py --benchmark-compare --benchmark-compare-fail=median:20%
+# Results are stored under .benchmarks/; --benchmark-compare compares with the latest saved run.
+
+import copy
+import pytest
+from mock_db import MockDatabase
+from sqlite_db import SQLiteDatabase
+from synthetic_campus import generate_campus
+
+pytest.importorskip("pytest_benchmark")
+
+ROOM_COUNTS = [100, 1000, 10000]
+WEEKS = 2 # keeps 10k-room campuses small enough to build for every run
+BACKENDS = ["mock", "sqlite"]
+
+@pytest.fixture(scope="module", params=ROOM_COUNTS)
+def campus(request):
+    rooms, calendars = generate_campus(request.param, weeks=WEEKS)
+    date = calendars[0].class_days()[2] # a Wednesday
+    return rooms, date
+
+@pytest.fixture(scope="module", params=BACKENDS)
+def database(request, campus, tmp_path_factory):
+    rooms, date = campus
+    if request.param == "mock":
+        database = MockDatabase()
+        database.rooms = copy.deepcopy(rooms) # the mock changes the room dicts in place
+    else:
+        database = SQLiteDatabase(str(tmp_path_factory.mktemp("sqlite") / "roomfinder.db"))
+        database.initialize_db()
+        database.load_rooms(rooms)
+    yield database, rooms, date
+    if request.param == "sqlite":
+        database.close()
+
+def test_rooms_with_sufficient_gap(benchmark, database):
+    database, rooms, date = database
+    results = benchmark(database.get_rooms_with_sufficient_gap, None, None, date, "10:00", "14:00", 60, limit=50)
+    assert results
+
+def test_rooms_with_sufficient_gap_in_building(benchmark, database):
+    database, rooms, date = database
+    benchmark(database.get_rooms_with_sufficient_gap, rooms[0]['building'], None, date, "10:00", "14:00", 60, limit=50)
+
+def test_next_availability_on_date(benchmark, database):
+    database, rooms, date = database
+    room_data = rooms[len(rooms) // 2]
+    benchmark(database.get_next_availability_on_date, room_data['building'], room_data['room'], date, "08:00", "18:00", 30)
+
+def test_add_event(benchmark, database):
+    database, rooms, date = database
+    room_data = rooms[-1]
+    args = (room_data['building'], room_data['room'], date, "23:00", "23:30")
+    # Remove the previous round's report so every round adds the same event.
+    # The setup must return None: pytest-benchmark takes anything else as the call's arguments.
+    def setup():
+        database.remove_user_event(*args)
+    benchmark.pedantic(database.add_event, args=(*args, "Study Group"), setup=setup, rounds=50)
+    assert database.add_event(*args, "Study Group") == "Event overlaps with an existing event"
+
+def test_cancel_event(benchmark, database):
+    database, rooms, date = database
+    room_data = next(room_data for room_data in rooms if room_data['schedule'].get(date))
+    event = next(event for event in room_data['schedule'][date] if event['status'] == "Scheduled")
+    args = (room_data['building'], room_data['room'], date, event['start_time'], event['end_time'])
+    def setup():
+        database.uncancel_event(*args)
+    benchmark.pedantic(database.cancel_event, args=args, setup=setup, rounds=50)
+
+def test_get_buildings(benchmark, database):
+    database, rooms, date = database
+    benchmark(database.get_buildings)
+
+def test_get_rooms_by_building(benchmark, database):
+    database, rooms, date = database
+    benchmark(database.get_rooms_by_building)
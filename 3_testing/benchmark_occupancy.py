@@ -0,0 +1,35 @@
+# Written by Colby
+# Benchmark the occupancy bitmap engine against the schedule sweep
+# Usage: python benchmark_occupancy.py
+
+import time
+import conftest  # adds 1_code to the path
+from mock_db import MockDatabase
+from test_occupancy import random_rooms, DATE
+
+ROOM_COUNTS = [1000, 10000]
+SEARCH = (None, None, DATE, "13:00", "17:00", 60)
+REPEATS = 20
+
+def time_search(db, limit):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        db.get_rooms_with_next_availability(*SEARCH, limit=limit)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+if __name__ == "__main__":
+    print(f"{'rooms':>6} {'limit':>6} {'sweep (ms)':>11} {'bitmap (ms)':>12} {'build (ms)':>11}")
+    for num_rooms in ROOM_COUNTS:
+        rooms = random_rooms(num_rooms)
+        sweep_db = MockDatabase(availability_engine="sweep")
+        sweep_db.rooms = rooms
+        bitmap_db = MockDatabase(availability_engine="bitmap")
+        bitmap_db.rooms = rooms
+
+        # The first search on a date builds its occupancy array
+        start = time.perf_counter()
+        bitmap_db._occupancy.day(DATE)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for limit in [20, num_rooms]:
+            print(f"{num_rooms:>6} {limit:>6} {time_search(sweep_db, limit):>11.2f} {time_search(bitmap_db, limit):>12.2f} {build_ms:>11.2f}")
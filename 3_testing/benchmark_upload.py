@@ -0,0 +1,84 @@
+# Written by Colby
+# Benchmark spreadsheet ingestion on a synthetic full-catalog CourseBook export
+# Usage: python benchmark_upload.py [number of sections]
+
+import os
+import sys
+import random
+import tempfile
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '2_data_collection')))
+from upload import read_spreadsheet, read_class_columns, group_class_times, DAY_INDEX  # noqa: E402
+from room_schedule import Schedule  # noqa: E402
+
+NUM_SECTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+DAY_PATTERNS = ["Monday, Wednesday", "Tuesday, Thursday", "Monday, Wednesday, Friday", "Friday", "Saturday", None]
+TIMES = ["08:30 - 09:45", "10:00 - 11:15", "11:30 - 12:45", "13:00 - 14:15", "14:30 - 15:45", "16:00 - 17:15", "19:00 - 21:45"]
+
+def read_spreadsheet_rows(filepath):
+    """Previous row-by-row ingestion, kept as the baseline."""
+    rooms = {}
+    excel_data = pd.read_excel(filepath, header=2)
+    for index, class_info in excel_data.iterrows():
+        location = class_info.get('location')
+        times = class_info.get('times')
+        days = class_info.get('days')
+        if location == "ONLINE" or pd.isna(location) or pd.isna(times):
+            continue
+        if location not in rooms:
+            rooms[location] = Schedule()
+        if isinstance(days, str):
+            for day in days.split(", "):
+                if day in DAY_INDEX:
+                    rooms[location].add_class_time(DAY_INDEX[day], times)
+    return rooms
+
+def write_catalog(filepath, num_sections, seed=0):
+    """Write a CourseBook-style export (two title rows, then the column names) with random sections."""
+    rng = random.Random(seed)
+    locations = [f"{building}_{floor}.{number:03d}" for building in ["ECSS", "JSOM", "SCI", "GR", "FO", "CB"]
+                 for floor in range(1, 5) for number in range(1, 21)]
+    sections = []
+    for i in range(num_sections):
+        online = rng.random() < 0.1
+        sections.append({
+            "section_address": f"cs{1000 + i % 9000}.{i % 100:03d}.25s",
+            "course_prefix": "cs",
+            "course_number": 1000 + i % 9000,
+            "title": f"Course {i}",
+            "instructor_s": f"Instructor {i % 800}",
+            "days": None if online else rng.choice(DAY_PATTERNS),
+            "times": "tbd - tbd" if online else rng.choice(TIMES),
+            "location": "ONLINE" if online else rng.choice(locations),
+            "activity_type": rng.choice(["Lecture", "Laboratory", "Seminar"]),
+            "school": "ECS",
+        })
+    with pd.ExcelWriter(filepath) as writer:
+        pd.DataFrame([["CourseBook v11 Export"], ["synthetic"]]).to_excel(writer, index=False, header=False)
+        pd.DataFrame(sections).to_excel(writer, index=False, startrow=2)
+
+def as_mapping(rooms):
+    return {location: [day.times for day in schedule.days] for location, schedule in rooms.items()}
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "catalog.xlsx")
+        write_catalog(filepath, NUM_SECTIONS)
+        print(f"{NUM_SECTIONS} sections, {os.path.getsize(filepath) / 1024:.0f} KB")
+
+        start = time.perf_counter()
+        baseline = as_mapping(read_spreadsheet_rows(filepath))
+        print(f"read_excel + iterrows: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        start = time.perf_counter()
+        class_info = read_class_columns(filepath)
+        read_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        rooms = as_mapping(group_class_times(class_info))
+        group_ms = (time.perf_counter() - start) * 1000
+        print(f"streaming + grouping: {read_ms + group_ms:.0f} ms (read {read_ms:.0f} ms, group {group_ms:.0f} ms)")
+
+        assert rooms == baseline == as_mapping(read_spreadsheet(filepath))
+        print(f"Both readers produced the same schedules for {len(rooms)} rooms")
@@ -0,0 +1,84 @@
+# Written by Colby
+# Seeded synthetic campuses for tests and benchmarks, expanded into room schedules by initialize_semester.py
+
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '1_code')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '2_data_collection')))
+from initialize_semester import build_room_schedules  # noqa: E402
+from recurrence import SemesterCalendar  # noqa: E402
+
+BUILDINGS = ["ECSS", "ECSW", "JSOM", "SCI", "GR", "FO", "CB", "SLC", "ATC", "HH", "JO", "FN"]
+ROOMS_PER_BUILDING = 100
+# Class meeting patterns as (weekday fields, time slots); slots in different patterns never share a day
+MEETING_PATTERNS = [
+    (["monday_times", "wednesday_times"], ["08:30 - 09:45", "10:00 - 11:15", "11:30 - 12:45", "13:00 - 14:15",
+                                           "14:30 - 15:45", "16:00 - 17:15", "17:30 - 18:45", "19:00 - 20:15"]),
+    (["tuesday_times", "thursday_times"], ["08:30 - 09:45", "10:00 - 11:15", "11:30 - 12:45", "13:00 - 14:15",
+                                           "14:30 - 15:45", "16:00 - 17:15", "17:30 - 18:45", "19:00 - 21:45"]),
+    (["friday_times"], ["09:00 - 11:45", "13:00 - 15:45"]),
+]
+SUBJECTS = ["CS", "SE", "MATH", "PHYS", "CHEM", "BIOL", "ECON", "ACCT", "HIST", "GOVT", "RHET", "ARTS"]
+
+def room_keys(num_rooms):
+    """Return num_rooms (building, room) pairs, filling buildings ROOMS_PER_BUILDING rooms at a time."""
+    keys = []
+    for i in range(num_rooms):
+        building_index = i // ROOMS_PER_BUILDING
+        building = BUILDINGS[building_index] if building_index < len(BUILDINGS) else f"B{building_index:03d}"
+        number = i % ROOMS_PER_BUILDING
+        keys.append((building, f"{1 + number // 25}.{101 + number % 25}"))
+    return keys
+
+def semester_calendars(num_semesters, weeks=16, first_day="2025-01-20"):
+    """Return consecutive Monday-to-Friday semesters of the given length, each with a holiday week in the middle."""
+    calendars = []
+    start = datetime.strptime(first_day, "%Y-%m-%d")
+    for _ in range(num_semesters):
+        end = start + timedelta(weeks=weeks, days=-3)
+        holidays = [(start + timedelta(weeks=weeks // 2, days=day)).strftime("%Y-%m-%d") for day in range(5)] if weeks >= 4 else []
+        calendars.append(SemesterCalendar(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), holidays))
+        start += timedelta(weeks=weeks + 4)
+    return calendars
+
+def class_records(keys, sections_per_room=6, seed=0):
+    """Return scraped class records (one per section) in the schema read by initialize_semester.py."""
+    rng = random.Random(seed)
+    slots = [(fields, time_range) for fields, time_ranges in MEETING_PATTERNS for time_range in time_ranges]
+    records = []
+    for building, room in keys:
+        # Sections in a room take distinct slots, so the room's classes never overlap
+        num_sections = min(max(round(rng.gauss(sections_per_room, 2)), 0), len(slots))
+        for fields, time_range in rng.sample(slots, num_sections):
+            record = {"room_location": f"{building}_{room}", "event_title": f"{rng.choice(SUBJECTS)} {rng.randint(1100, 4399)}"}
+            for field in fields:
+                record[field] = [time_range]
+            records.append(record)
+    return records
+
+def generate_campus(num_rooms, num_semesters=1, weeks=16, sections_per_room=6, cancel_rate=0.02, seed=0):
+    """
+    Return rooms in the dated schedule layout for a campus of num_rooms rooms, with classes expanded over
+    num_semesters semesters by initialize_semester.py and a cancel_rate share of class meetings cancelled.
+    Also returns the semester calendars.
+    """
+    keys = room_keys(num_rooms)
+    records = class_records(keys, sections_per_room, seed)
+    calendars = semester_calendars(num_semesters, weeks)
+
+    schedules = {key: {} for key in keys} # rooms without classes are still in the catalog
+    for calendar in calendars:
+        for key, room_schedule in build_room_schedules(records, calendar).items():
+            schedules[key].update(room_schedule)
+
+    rng = random.Random(seed + 1)
+    for room_schedule in schedules.values():
+        for events in room_schedule.values():
+            for event in events:
+                if rng.random() < cancel_rate:
+                    event['status'] = "Cancelled"
+    rooms = [{"building": building, "room": room, "schedule": schedules[(building, room)]} for building, room in keys]
+    return rooms, calendars
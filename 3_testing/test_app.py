@@ -9,6 +9,7 @@ os.environ['DB_TYPE'] = 'mock'
 
 from app import app as flask_app # Rename to avoid conflict with pytest 'app' fixture
 from app import db as mock_db  # Import to directly verify database interactions
+from app import catalog
     
 # Use Pytest Fixtures for managing testing context
 
@@ -72,6 +73,21 @@ def test_search_page_loads(client):
     assert response.status_code == 200
     assert b"Find a Room at UTD" in response.data
 
+# Test GET / serves the building and room lists from the catalog cache
+def test_search_page_catalog_cache(client):
+    mock_db.rooms = get_mock_room_data()
+    client.get('/')
+    hits, misses = catalog.hits, catalog.misses
+    response = client.get('/')
+    assert BUILDING.encode('utf-8') in response.data
+    assert catalog.hits == hits + 2 and catalog.misses == misses
+
+    # Loading new rooms invalidates the cached catalog
+    mock_db.rooms = MOCK_EMPTY_SCHEDULE + [{"building": "NewBuilding", "room": "N.101", "schedule": {}}]
+    response = client.get('/')
+    assert b"NewBuilding" in response.data
+    assert catalog.misses == misses + 2
+
 # Test GET /map
 def test_map_page_loads(client):
     response = client.get('/map')
@@ -244,4 +260,35 @@ def test_confirm_event(client):
     assert json_data['room'] == ROOM
     assert json_data['start_time'] == EVENT_START_TIME
     assert json_data['end_time'] == EVENT_END_TIME
-    assert json_data['notes'] == NOTES
\ No newline at end of file
+    assert json_data['notes'] == NOTES
+
+# Test search results include the room's next availability
+def test_search_next_availability(client):
+    mock_db.rooms = get_mock_room_data()
+    form_data = {
+        'building': BUILDING,
+        'room': ROOM,
+        'date': DATE,
+        'start_time': '11:00',
+        'end_time': SEARCH_END_TIME,
+        'duration': MIN_DURATION
+    }
+    response = client.post('/results', data=form_data)
+    assert response.status_code == 200
+    assert b"12:00 - 14:00" in response.data # first gap after the 10:00-12:00 event
+
+# Test GET /metrics reports request latency and database calls, and the Server-Timing option
+def test_metrics(client, monkeypatch):
+    monkeypatch.setattr("app.SERVER_TIMING", True)
+    mock_db.rooms = get_mock_room_data()
+    response = client.post('/results', data={'building': BUILDING, 'room': ROOM, 'date': DATE, 'duration': MIN_DURATION})
+    assert response.status_code == 200
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    text = response.get_data(as_text=True)
+    assert 'roomfinder_http_request_seconds_count{route="/results",method="POST",status="200"}' in text
+    assert 'roomfinder_db_calls_total{method="get_rooms_with_next_availability"}' in text
+    assert 'roomfinder_request_db_calls_bucket{route="/results",le="1"}' in text
@@ -0,0 +1,63 @@
+# Written by Colby
+# Basic Function Testing for the ASGI App (requires Quart)
+
+import asyncio
+import os
+import pytest
+
+pytest.importorskip("quart")
+
+# Set environment variable before importing the app to use mock database
+os.environ['DB_TYPE'] = 'mock'
+
+from asgi_app import app as quart_app, db as mock_db  # noqa: E402
+
+DATE = "2025-04-14"
+BUILDING = "TestBuilding"
+ROOM = "T.101"
+
+@pytest.fixture(scope='module')
+def app():
+    quart_app.config.update({"TESTING": True})
+    asyncio.run(quart_app.startup())
+    yield quart_app
+    asyncio.run(quart_app.shutdown())
+
+@pytest.fixture(autouse=True)
+def reset_mock_db_state(app):
+    mock_db.sync.clear_db()
+    mock_db.sync.add_room(BUILDING, ROOM, {DATE: [
+        {"start_time": "10:00", "end_time": "12:00", "status": "Scheduled", "event_title": "Test Event", "notes": ""}
+    ]})
+    yield
+
+def test_search_page(app):
+    async def get():
+        response = await app.test_client().get('/')
+        return response.status_code, await response.get_data(as_text=True)
+
+    status, body = asyncio.run(get())
+    assert status == 200
+    assert BUILDING in body
+
+def test_results_and_report(app):
+    async def requests():
+        client = app.test_client()
+        results = await client.post('/results', form={
+            "building": BUILDING, "room": ROOM, "date": DATE, "start_time": "09:00", "end_time": "14:00", "duration": "30"
+        })
+        report = await client.post('/api/report', form={
+            "building": BUILDING, "room": ROOM, "date": DATE, "start_time": "12:00", "end_time": "13:00",
+            "report_type": "add", "event_title": "Study Group"
+        })
+        schedule = await client.get(f'/api/schedule/{BUILDING}/{ROOM}')
+        metrics = await client.get('/metrics')
+        return (results.status_code, await results.get_data(as_text=True), report.status_code,
+                await schedule.get_json(), await metrics.get_data(as_text=True))
+
+    results_status, results_body, report_status, schedule, metrics = asyncio.run(requests())
+    assert results_status == 200
+    assert "09:00 - 10:00" in results_body
+    assert report_status == 200
+    assert [event['start_time'] for event in schedule[DATE]] == ["10:00", "12:00"]
+    assert 'roomfinder_http_request_seconds_count{route="/results",method="POST",status="200"}' in metrics
@@ -0,0 +1,87 @@
+# Written by Colby
+# Tests for the async database adapter and catalog cache used by the ASGI app
+
+import asyncio
+import copy
+import pytest
+from async_db import AsyncDatabaseAdapter
+from catalog_cache import AsyncCatalogCache
+from metrics import InstrumentedDatabase, start_request, finish_request
+from mock_db import MockDatabase
+from sqlite_db import SQLiteDatabase
+from test_db import SAMPLE_ROOM_1, SAMPLE_ROOM_2, SAMPLE_ROOM_3
+
+SAMPLE_ROOMS = [SAMPLE_ROOM_1, SAMPLE_ROOM_2, SAMPLE_ROOM_3]
+
+@pytest.fixture(params=["mock", "sqlite"])
+def databases(request, tmp_path):
+    """An async adapter and a separate sync database holding the same rooms."""
+    def make(name):
+        if request.param == "mock":
+            database = MockDatabase()
+            database.rooms = copy.deepcopy(SAMPLE_ROOMS)
+        else:
+            database = SQLiteDatabase(str(tmp_path / name))
+            database.initialize_db()
+            database.load_rooms(SAMPLE_ROOMS)
+        return database
+    sync_db = make("sync.db")
+    async_db = AsyncDatabaseAdapter(make("async.db"), offload=request.param == "sqlite")
+    yield async_db, sync_db
+    if request.param == "sqlite":
+        sync_db.close()
+        async_db.sync.close()
+
+def test_reads_match_sync(databases):
+    """Test that the adapter's reads return the same results as the sync database"""
+    async_db, sync_db = databases
+
+    async def reads():
+        return await asyncio.gather(
+            async_db.get_room("ECSS", "2.101"),
+            async_db.get_buildings(),
+            async_db.get_rooms_by_building(),
+            async_db.get_rooms_with_next_availability(None, None, "2025-09-01", "08:00", "18:00", 60),
+            async_db.get_rooms_with_sufficient_gap("ECSS", None, "2025-09-01", "09:00", "12:00", 45),
+            async_db.get_next_availability_on_date("ECSS", "2.101", "2025-09-01", "09:00", "12:00", 15),
+        )
+
+    assert asyncio.run(reads()) == [
+        sync_db.get_room("ECSS", "2.101"),
+        sync_db.get_buildings(),
+        sync_db.get_rooms_by_building(),
+        sync_db.get_rooms_with_next_availability(None, None, "2025-09-01", "08:00", "18:00", 60),
+        sync_db.get_rooms_with_sufficient_gap("ECSS", None, "2025-09-01", "09:00", "12:00", 45),
+        sync_db.get_next_availability_on_date("ECSS", "2.101", "2025-09-01", "09:00", "12:00", 15),
+    ]
+
+def test_writes(databases):
+    """Test that writes through the adapter reach the wrapped database"""
+    async_db, _ = databases
+
+    async def writes():
+        assert await async_db.add_event("ECSS", "2.102", "2025-09-01", "12:00", "13:00", "Study Group") is True
+        assert await async_db.add_event("ECSS", "2.102", "2025-09-01", "12:30", "13:30", "Study Group") == "Event overlaps with an existing event"
+        assert await async_db.cancel_event("ECSS", "2.102", "2025-09-01", "10:00", "11:00") is True
+        assert await async_db.uncancel_event("ECSS", "2.102", "2025-09-01", "10:00", "11:00") is True
+        assert await async_db.remove_user_event("ECSS", "2.102", "2025-09-01", "12:00", "13:00") is True
+        return await async_db.get_next_availability_on_date("ECSS", "2.102", "2025-09-01", "10:00", "14:00", 60)
+
+    assert asyncio.run(writes()) == "11:00 - 14:00"
+
+def test_catalog_cache_and_timing():
+    """Test that the async catalog cache reuses entries and that instrumented async calls are timed"""
+    database = MockDatabase()
+    database.rooms = copy.deepcopy(SAMPLE_ROOMS)
+    async_db = InstrumentedDatabase(AsyncDatabaseAdapter(database))
+    catalog = AsyncCatalogCache(async_db)
+
+    async def load():
+        start_request()
+        buildings = [await catalog.get_buildings() for _ in range(3)]
+        return buildings, finish_request()
+
+    buildings, timings = asyncio.run(load())
+    assert buildings == [["ECSS", "JSOM"]] * 3
+    assert catalog.stats()["hits"] == 2 and catalog.stats()["misses"] == 1
+    assert timings["db"][0] == 1
@@ -3,9 +3,15 @@
 
 import pytest
 import os
+import asyncio
 from dotenv import load_dotenv
 from pymongo.errors import ConnectionFailure
-from mongodb import MongoDatabase
+from mongodb import MongoDatabase, promote_collection, bump_collection_version, create_room_index, room_day_docs, \
+    create_room_day_indexes, ALIASES_COLLECTION
+from recurrence import SemesterCalendar, SEMESTERS_COLLECTION
+from util import format_time_range
+from snapshot import AvailabilitySnapshot
+from async_mongodb import AsyncMongoDatabase
 
 TEST_SEMESTER_COLLECTION = "test_semester_data"
 
@@ -47,11 +53,12 @@ def db_instance():
 
     # Check if credentials are set
     load_dotenv()
-    if not os.environ.get("mongodb_user") or not os.environ.get("mongodb_pwd"):
-         pytest.fail("Missing 'mongodb_user' or 'mongodb_pwd' environment variables. Cannot run integration tests.")
+    if not os.environ.get("MONGO_URI") and (not os.environ.get("mongodb_user") or not os.environ.get("mongodb_pwd")):
+         pytest.fail("Missing 'MONGO_URI' or 'mongodb_user' and 'mongodb_pwd' environment variables. Cannot run integration tests.")
 
     database = MongoDatabase()
     database.semester_collection = TEST_SEMESTER_COLLECTION
+    database.semester_names = [TEST_SEMESTER_COLLECTION] # keep real semesters out of the routing
     
     # Initialize connection
     try:
@@ -67,6 +74,7 @@ def db_instance():
     if database.client:
         try:
             database.db.drop_collection(TEST_SEMESTER_COLLECTION)
+            database.db.drop_collection(database.free_collection.name)
         except Exception as e:
             print(f"Error dropping test collection: {e}")
         database.client.close()
@@ -82,6 +90,7 @@ def test_db(db_instance):
     # Insert fresh sample data
     try:
         collection.insert_many([SAMPLE_ROOM_1.copy(), SAMPLE_ROOM_2.copy(), SAMPLE_ROOM_3.copy()])
+        create_room_index(collection)
         # print("Sample data inserted.")
     except Exception as e:
         pytest.fail(f"Failed to insert sample data: {e}")
@@ -113,6 +122,18 @@ def test_get_room_not_found(test_db):
     room = test_db.get_room("NonExistent", "123")
     assert room is None
 
+def test_get_room_on_date_projection(test_db):
+    """Test that date-scoped reads only return the requested date's schedule"""
+    room = test_db._get_room_on_date("ECSS", "2.101", "2025-09-01")
+    assert room["building"] == "ECSS"
+    assert room["room"] == "2.101"
+    assert list(room["schedule"].keys()) == ["2025-09-01"]
+    assert len(room["schedule"]["2025-09-01"]) == 3
+
+    # Rooms without events on that date come back with an empty schedule
+    room = test_db._get_room_on_date("JSOM", "1.101", "2025-09-01")
+    assert room["schedule"] == {}
+
 def test_get_buildings(test_db):
     """Test retrieving the list of unique buildings"""
     buildings = test_db.get_buildings()
@@ -160,6 +181,34 @@ def test_add_event_overlap(test_db):
     schedule = room.get("schedule", {}).get("2025-09-01", [])
     assert len(schedule) == 3 # Should remain unchanged from sample data
 
+def test_add_event_overlap_by_minutes(test_db):
+    """Test that overlaps are found by the stored minutes, even for events whose times aren't zero-padded"""
+    test_db.collection.update_one({"building": "ECSS", "room": "2.102"}, {"$push": {"schedule.2025-09-01": {
+        "start_time": "8:00", "end_time": "8:50", "start_min": 480, "end_min": 530, "status": "Scheduled", "event_title": "Legacy", "notes": ""
+    }}})
+    assert test_db.add_event("ECSS", "2.102", "2025-09-01", "08:30", "09:00") == "Event overlaps with an existing event"
+    assert test_db.add_event("ECSS", "2.102", "2025-09-01", "08:50", "09:30") is True
+
+def test_room_index_created_on_startup(test_db):
+    """Test that a collection built without the unique room index gets it, so overlapping reports can't duplicate a room"""
+    test_db.collection.drop_indexes()
+    test_db.semesters = {}
+    test_db._get_semester(TEST_SEMESTER_COLLECTION)
+    assert any(info["key"] == [("building", 1), ("room", 1)] and info.get("unique")
+               for info in test_db.collection.index_information().values())
+
+    assert test_db.add_event("ECSS", "2.101", "2025-09-01", "10:00", "11:00") == "Event overlaps with an existing event"
+    assert test_db.collection.count_documents({"building": "ECSS", "room": "2.101"}) == 1
+
+def test_add_event_concurrent_overlap(test_db):
+    """Test that only one of several concurrent overlapping reports is stored, without duplicating the room"""
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: test_db.add_event("GR", "2.201", "2025-09-01", "12:00", "13:00"), range(4)))
+    assert results.count(True) == 1
+    assert results.count("Event overlaps with an existing event") == 3
+    assert test_db.collection.count_documents({"building": "GR", "room": "2.201"}) == 1
+
 def test_add_event_overlap_with_cancelled(test_db):
     """Test adding an event that overlaps ONLY with a cancelled event (should succeed)"""
      # Overlaps with ECSS/2.101 14:00-15:00 (Cancelled) on 2025-09-01
@@ -336,4 +385,215 @@ def test_get_rooms_with_sufficient_gap_limit(test_db):
     """Test the limit parameter"""
     # All 3 rooms are available on this date
     free_rooms = test_db.get_rooms_with_sufficient_gap(None, None, "2025-10-01", "08:00", "18:00", min_duration=60, limit=2)
-    assert len(free_rooms) == 2
\ No newline at end of file
+    assert len(free_rooms) == 2
+
+def test_sufficient_gap_returns_rooms_in_every_mode(test_db):
+    """Test that the search mode doesn't change what get_rooms_with_sufficient_gap returns"""
+    args = (None, None, "2025-09-01", "08:00", "18:00", 60)
+    try:
+        test_db.search_mode = "python"
+        python_results = test_db.get_rooms_with_sufficient_gap(*args)
+        test_db.search_mode = "aggregate"
+        assert test_db.get_rooms_with_sufficient_gap(*args) == python_results
+        assert all('schedule' in r for r in python_results)
+    finally:
+        test_db.search_mode = "python"
+
+def test_get_rooms_with_next_availability(test_db):
+    """Test that rooms are returned together with their first qualifying slot"""
+    results = test_db.get_rooms_with_next_availability("ECSS", None, "2025-09-01", "09:00", "12:00", min_duration=15)
+    by_room = {(r['building'], r['room']): r['next_availability'] for r in results}
+    assert by_room == {
+        ("ECSS", "2.101"): (630, 660), # 10:30 - 11:00
+        ("ECSS", "2.102"): (540, 600), # 09:00 - 10:00
+    }
+
+    # Results agree with the per-room lookups
+    for r in test_db.get_rooms_with_next_availability(None, None, "2025-09-01", "08:00", "18:00", min_duration=60):
+        assert format_time_range(r['next_availability']) == test_db.get_next_availability_on_date(
+            r['building'], r['room'], "2025-09-01", "08:00", "18:00", 60)
+
+@pytest.mark.parametrize("start_time, end_time, min_duration", [
+    ("00:00", "23:59", 1),
+    ("08:00", "18:00", 60),
+    ("09:00", "12:00", 15),
+    ("09:00", "12:00", 45),
+    ("10:00", "11:00", 30),
+])
+def test_search_modes_agree(test_db, start_time, end_time, min_duration):
+    """Test that the aggregation pipeline returns the same rooms and slots as the Python sweep"""
+    try:
+        for date in ["2025-09-01", "2025-09-02", "2025-12-25"]:
+            test_db.search_mode = "python"
+            python_results = test_db.get_rooms_with_next_availability(None, None, date, start_time, end_time, min_duration)
+            test_db.search_mode = "aggregate"
+            aggregate_results = test_db.get_rooms_with_next_availability(None, None, date, start_time, end_time, min_duration)
+            assert aggregate_results == python_results
+    finally:
+        test_db.search_mode = "python"
+
+def test_free_interval_search(test_db):
+    """Test that free-interval searches agree with the Python sweep and stay in sync with writes"""
+    test_db.rebuild_free_intervals("2025-09-01", "2025-09-03")
+
+    def search(mode, *args):
+        test_db.search_mode = mode
+        return {(r['building'], r['room']): r['next_availability']
+                for r in test_db.get_rooms_with_next_availability(None, None, *args)}
+
+    try:
+        for args in [("2025-09-01", "08:00", "18:00", 60), ("2025-09-01", "09:00", "12:00", 15),
+                     ("2025-09-02", "09:00", "12:00", 90), ("2025-09-01", "10:00", "10:30", 60)]:
+            assert search("free_intervals", *args) == search("python", *args)
+
+        # With syncing on, writes keep the free intervals in sync, including rooms created by a report, whatever the
+        # writer's search mode
+        test_db.search_mode = "python"
+        test_db.free_intervals_sync = True
+        assert test_db.add_event("JSOM", "1.101", "2025-09-03", "00:00", "23:59") is True
+        assert test_db.add_event("GR", "2.201", "2025-09-03", "08:00", "12:00") is True
+        assert test_db.cancel_event("ECSS", "2.101", "2025-09-01", "11:00", "12:00") is True
+        for args in [("2025-09-03", "08:00", "18:00", 60), ("2025-09-02", "08:00", "18:00", 60),
+                     ("2025-09-01", "10:30", "13:00", 60)]:
+            assert search("free_intervals", *args) == search("python", *args)
+    finally:
+        test_db.search_mode = "python"
+        test_db.free_intervals_sync = False
+
+def test_promoted_collection_is_picked_up(test_db):
+    """Test that promoting a rebuilt collection switches the app over without reinitializing"""
+    staging_name = TEST_SEMESTER_COLLECTION + "_staging"
+    test_db.db[staging_name].insert_one({"building": "GR", "room": "3.301", "schedule": {}})
+    generation = test_db.catalog_generation
+    try:
+        assert promote_collection(test_db.db, TEST_SEMESTER_COLLECTION, staging_name) == TEST_SEMESTER_COLLECTION
+        assert test_db.get_buildings() == ["ECSS", "JSOM"] # alias is not checked again until the interval passes
+
+        test_db._semester()._alias_checked_at = float("-inf")
+        assert test_db.get_buildings() == ["GR"]
+        assert test_db.active_collection == staging_name
+        assert test_db.catalog_generation > generation
+    finally:
+        test_db.db[ALIASES_COLLECTION].delete_one({"_id": TEST_SEMESTER_COLLECTION})
+        test_db.db.drop_collection(staging_name)
+        test_db._semester()._alias_checked_at = float("-inf")
+        assert test_db.collection.name == TEST_SEMESTER_COLLECTION # switched back to the test collection
+
+def test_incremental_update_outdates_the_snapshot(test_db, tmp_path):
+    """Test that a snapshot built before an in-place update of the collection is no longer used"""
+    snapshot_path = test_db.snapshot_path
+    test_db.snapshot_path = str(tmp_path / "availability.snapshot")
+    test_db.rebuild_snapshot()
+    snapshot = AvailabilitySnapshot(test_db.snapshot_path)
+    try:
+        assert test_db._snapshot_is_current(snapshot)
+        bump_collection_version(test_db.db, TEST_SEMESTER_COLLECTION)
+        test_db._semester()._alias_checked_at = float("-inf")
+        assert not test_db._snapshot_is_current(snapshot)
+        assert test_db.active_collection == TEST_SEMESTER_COLLECTION # the collection itself is still served
+    finally:
+        snapshot.close()
+        test_db.snapshot_path = snapshot_path
+        test_db.db[ALIASES_COLLECTION].delete_one({"_id": TEST_SEMESTER_COLLECTION})
+        test_db._semester()._alias_checked_at = float("-inf")
+
+def test_dates_are_routed_to_their_semester(test_db):
+    """Test that a date in another registered semester reads and writes that semester's collection"""
+    next_semester = TEST_SEMESTER_COLLECTION + "_next"
+    semesters = test_db.db[SEMESTERS_COLLECTION]
+    semesters.insert_many([SemesterCalendar("2025-08-25", "2025-12-12").to_document(TEST_SEMESTER_COLLECTION),
+                           SemesterCalendar("2026-01-12", "2026-05-08").to_document(next_semester)])
+    test_db.semester_names = [TEST_SEMESTER_COLLECTION, next_semester]
+    try:
+        test_db._load_registry()
+        assert test_db.get_date_range() == ("2025-08-25", "2026-05-08")
+
+        assert test_db.add_event("ECSS", "2.101", "2026-01-12", "09:00", "10:00", "Next Semester Class") is True
+        assert test_db.db[next_semester].count_documents({"building": "ECSS", "room": "2.101"}) == 1
+        assert "2026-01-12" not in test_db.collection.find_one({"building": "ECSS", "room": "2.101"})["schedule"]
+
+        assert test_db.get_next_availability_on_date("ECSS", "2.101", "2026-01-12", "09:00", "12:00", 30) == "10:00 - 12:00"
+        assert set(test_db.get_room("ECSS", "2.101")["schedule"]) == {"2025-09-01", "2025-09-02", "2026-01-12"}
+
+        # Dates between and outside the semesters are not served
+        assert test_db.get_rooms_with_next_availability(None, None, "2025-12-25", "08:00", "18:00", 60) == []
+        assert test_db.get_next_availability_on_date("ECSS", "2.101", "2026-06-01", "09:00", "12:00", 30) is None
+        assert test_db.add_event("ECSS", "2.101", "2025-12-25", "09:00", "10:00") == "Date is outside the semester"
+    finally:
+        semesters.delete_many({"collection": {"$in": [TEST_SEMESTER_COLLECTION, next_semester]}})
+        test_db.db.drop_collection(next_semester)
+        test_db.semester_names = [TEST_SEMESTER_COLLECTION]
+        test_db.semesters.pop(next_semester, None)
+        test_db._load_registry()
+
+def test_registry_only_serves_the_app_layout(test_db):
+    """Test that a converted copy registered next to its source is not served in the source's layout"""
+    converted = TEST_SEMESTER_COLLECTION + "_recurring"
+    semesters = test_db.db[SEMESTERS_COLLECTION]
+    calendar = SemesterCalendar("2025-08-25", "2025-12-12")
+    semesters.insert_many([calendar.to_document(TEST_SEMESTER_COLLECTION), calendar.to_document(converted, layout="recurring")])
+    test_db.semester_names = None
+    try:
+        test_db._load_registry()
+        names = [name for name, _, _ in test_db.registry]
+        assert TEST_SEMESTER_COLLECTION in names and converted not in names
+
+        test_db.schedule_layout = "recurring"
+        test_db._load_registry()
+        names = [name for name, _, _ in test_db.registry]
+        assert converted in names and TEST_SEMESTER_COLLECTION not in names
+    finally:
+        test_db.schedule_layout = "dated"
+        semesters.delete_many({"collection": {"$in": [TEST_SEMESTER_COLLECTION, converted]}})
+        test_db.semester_names = [TEST_SEMESTER_COLLECTION]
+        test_db._load_registry()
+
+def test_room_day_layout(test_db):
+    """Test that the room_day layout answers reads and writes like the dated layout"""
+    searches = [("2025-09-01", "08:00", "18:00", 60), ("2025-09-02", "09:00", "12:00", 90), ("2025-09-03", "09:00", "12:00", 30)]
+    dated_results = [test_db.get_rooms_with_next_availability(None, None, *args) for args in searches]
+    dated_room = test_db.get_room("ECSS", "2.101")
+
+    # Convert the sample data in place
+    day_collection = test_db._semester().day_collection
+    rooms = list(test_db.collection.find({}, {"_id": 0}))
+    test_db.collection.drop()
+    for room_data in rooms:
+        header, days = room_day_docs(room_data)
+        test_db.collection.insert_one(header)
+        if days:
+            day_collection.insert_many(days)
+    create_room_day_indexes(test_db.collection, day_collection)
+
+    test_db.schedule_layout = "room_day"
+    try:
+        assert [test_db.get_rooms_with_next_availability(None, None, *args) for args in searches] == dated_results
+        assert test_db.get_room("ECSS", "2.101") == dated_room
+
+        assert test_db.add_event("ECSS", "2.102", "2025-09-01", "08:00", "09:00", "Early Report") is True
+        assert test_db.add_event("GR", "2.201", "2025-09-01", "08:00", "09:00", "New Room") is True
+        assert test_db.cancel_event("ECSS", "2.102", "2025-09-01", "10:00", "11:00") is True
+        assert test_db.remove_user_event("ECSS", "2.102", "2025-09-01", "08:00", "09:00") is True
+        assert test_db.get_next_availability_on_date("GR", "2.201", "2025-09-01", "08:00", "12:00", 30) == "09:00 - 12:00"
+        assert test_db.get_next_availability_on_date("ECSS", "2.102", "2025-09-01", "09:30", "12:00", 60) == "09:30 - 12:00"
+        assert day_collection.count_documents({"building": "ECSS", "room": "2.102"}) == 1
+    finally:
+        test_db.schedule_layout = "dated"
+        test_db.db.drop_collection(day_collection.name)
+
+
+def test_async_searches_match_sync(test_db):
+    """Test that the async client's searches and catalog reads return the same results as the sync methods"""
+    async def compare():
+        async_db = AsyncMongoDatabase(test_db)
+        await async_db._connect()
+        try:
+            assert await async_db.get_buildings() == test_db.get_buildings()
+            assert await async_db.get_rooms_by_building() == test_db.get_rooms_by_building()
+            assert await async_db.get_rooms_with_next_availability(None, None, "2025-09-01", "08:00", "18:00", 60) == \
+                test_db.get_rooms_with_next_availability(None, None, "2025-09-01", "08:00", "18:00", 60)
+            assert await async_db.get_next_availability_on_date("ECSS", "2.101", "2025-09-01", "09:00", "12:00", 15) == "10:30 - 11:00"
+        finally:
+            await async_db.client.close()
+
+    asyncio.run(compare())
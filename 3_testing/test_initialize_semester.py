@@ -0,0 +1,143 @@
+# Written by Colby
+# Tests for the incremental semester rebuild in initialize_semester.py, with an in-memory stand-in for the collection
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '2_data_collection')))
+from initialize_semester import merge_date, update_room_schedules, refresh_free_intervals  # noqa: E402
+from util import make_event  # noqa: E402
+
+DATE = "2025-09-01"
+OTHER_DATE = "2025-09-03"
+
+class FakeSemesterCollection:
+    """Applies the (building, room) UpdateOne upserts that update_room_schedules sends to room documents in memory."""
+    def __init__(self, rooms):
+        self.rooms = {(room_data['building'], room_data['room']): room_data for room_data in rooms}
+
+    def find(self, query, projection):
+        return [dict(room_data) for room_data in self.rooms.values()]
+
+    def find_one(self, query, projection):
+        return self.rooms.get((query['building'], query['room']))
+
+    def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            key = (request._filter['building'], request._filter['room'])
+            if key not in self.rooms:
+                assert request._upsert
+                self.rooms[key] = {"building": key[0], "room": key[1]}
+            room_data = self.rooms[key]
+            for field, value in request._doc.get("$set", {}).items():
+                self._path(room_data, field)[field.split(".")[-1]] = value
+            for field in request._doc.get("$unset", {}):
+                self._path(room_data, field).pop(field.split(".")[-1], None)
+
+    def _path(self, room_data, field):
+        """Return the dict holding a dotted field, creating missing parents."""
+        for part in field.split(".")[:-1]:
+            room_data = room_data.setdefault(part, {})
+        return room_data
+
+def test_merge_date_keeps_cancellations_notes_and_reports():
+    """Test that classes that still exist keep their stored status and notes, and user reports are kept"""
+    stored = [
+        make_event("09:00", "10:15", "Cancelled", "CS 1337", "Instructor out"),
+        make_event("10:30", "11:45", "Scheduled", "CS 2305"),
+        make_event("12:00", "13:00", "User Reported", "Study Group", "Room 2.101"),
+    ]
+    fresh = [
+        make_event("09:00", "10:15", "Scheduled", "CS 1337"),
+        make_event("14:00", "15:15", "Scheduled", "CS 3345"),
+    ]
+    assert merge_date(stored, fresh) == [
+        make_event("09:00", "10:15", "Cancelled", "CS 1337", "Instructor out"), # kept as stored
+        make_event("12:00", "13:00", "User Reported", "Study Group", "Room 2.101"),
+        make_event("14:00", "15:15", "Scheduled", "CS 3345"), # new class; CS 2305 no longer meets
+    ]
+
+def test_merge_date_unchanged():
+    """Test that a date whose classes didn't change is left alone, whatever its statuses and reports"""
+    stored = [
+        make_event("09:00", "10:15", "Cancelled", "CS 1337", "Instructor out"),
+        make_event("12:00", "13:00", "User Reported", "Study Group"),
+    ]
+    assert merge_date(stored, [make_event("09:00", "10:15", "Scheduled", "CS 1337")]) is None
+    assert merge_date([], []) is None
+
+def test_update_room_schedules():
+    """Test that only changed rooms and dates are rewritten, keeping cancellations, notes and user reports"""
+    collection = FakeSemesterCollection([
+        {"building": "ECSS", "room": "2.101", "location": {"lat": 1, "lng": 2}, "schedule": {
+            DATE: [make_event("09:00", "10:15", "Cancelled", "CS 1337", "Instructor out"),
+                   make_event("12:00", "13:00", "User Reported", "Study Group")],
+            OTHER_DATE: [make_event("09:00", "10:15", "Scheduled", "CS 1337")],
+        }},
+        {"building": "JSOM", "room": "1.101", "schedule": {
+            DATE: [make_event("08:30", "09:45", "Scheduled", "ACCT 2301")],
+            OTHER_DATE: [make_event("08:30", "09:45", "Scheduled", "ACCT 2301"),
+                         make_event("18:00", "19:00", "User Reported", "Club Meeting")],
+        }},
+    ])
+    room_schedules = {
+        ("ECSS", "2.101"): {
+            DATE: [make_event("09:00", "10:15", "Scheduled", "CS 1337"), make_event("13:00", "14:15", "Scheduled", "CS 2305")],
+            OTHER_DATE: [make_event("09:00", "10:15", "Scheduled", "CS 1337")],
+        },
+        ("SCI", "1.210"): {DATE: [make_event("08:30", "09:45", "Scheduled", "PHYS 2325")]},
+        # JSOM 1.101 no longer has classes
+    }
+
+    changed_dates, added_rooms = update_room_schedules(room_schedules, collection)
+
+    assert sorted(changed_dates) == [("ECSS", "2.101", DATE), ("JSOM", "1.101", DATE), ("JSOM", "1.101", OTHER_DATE),
+                                     ("SCI", "1.210", DATE)]
+    assert added_rooms == [("SCI", "1.210")]
+    ecss = collection.rooms[("ECSS", "2.101")]
+    assert ecss["location"] == {"lat": 1, "lng": 2} # room metadata is untouched
+    assert ecss["schedule"] == {
+        DATE: [make_event("09:00", "10:15", "Cancelled", "CS 1337", "Instructor out"),
+               make_event("12:00", "13:00", "User Reported", "Study Group"),
+               make_event("13:00", "14:15", "Scheduled", "CS 2305")],
+        OTHER_DATE: [make_event("09:00", "10:15", "Scheduled", "CS 1337")],
+    }
+    # Dates left without classes are removed unless they hold user reports
+    assert collection.rooms[("JSOM", "1.101")]["schedule"] == {
+        OTHER_DATE: [make_event("18:00", "19:00", "User Reported", "Club Meeting")],
+    }
+    assert collection.rooms[("SCI", "1.210")]["schedule"] == room_schedules[("SCI", "1.210")]
+
+    # A second run with the same classes changes nothing
+    assert update_room_schedules(room_schedules, collection) == ([], [])
+
+class FakeFreeCollection:
+    """Applies the DeleteMany and InsertOne requests that refresh_free_intervals sends to interval documents in memory."""
+    def __init__(self, coverage):
+        self.coverage = coverage
+        self.intervals = []
+
+    def find_one(self, query):
+        return self.coverage
+
+    def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            if hasattr(request, "_doc"):
+                self.intervals.append(request._doc)
+            else:
+                self.intervals = [doc for doc in self.intervals
+                                  if any(doc[field] != value for field, value in request._filter.items())]
+
+def test_added_rooms_get_free_intervals_for_every_covered_date():
+    """Test that a room added by an incremental run is free on the covered dates without classes"""
+    collection = FakeSemesterCollection([
+        {"building": "SCI", "room": "1.210", "schedule": {DATE: [make_event("08:00", "23:59", "Scheduled", "PHYS 2325")]}},
+    ])
+    free_collection = FakeFreeCollection({"_id": "coverage", "start_date": DATE, "end_date": OTHER_DATE})
+
+    refresh_free_intervals([("SCI", "1.210", DATE)], [("SCI", "1.210")], collection, free_collection)
+
+    by_date = {}
+    for doc in free_collection.intervals:
+        by_date.setdefault(doc["date"], []).append((doc["start_min"], doc["end_min"]))
+    assert by_date == {DATE: [(0, 480)], "2025-09-02": [(0, 1439)], OTHER_DATE: [(0, 1439)]}
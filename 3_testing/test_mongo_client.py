@@ -0,0 +1,22 @@
+# Written by Colby
+# Tests for the MongoClient options read from the environment
+
+from mongodb import mongo_client_options
+
+def test_client_options_from_environment(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "50")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "5")
+    monkeypatch.setenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "3000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zstd,zlib")
+    monkeypatch.setenv("MONGO_SOCKET_TIMEOUT_MS", "")
+    assert mongo_client_options() == {
+        "maxPoolSize": 50,
+        "minPoolSize": 5,
+        "serverSelectionTimeoutMS": 3000,
+        "compressors": "zstd,zlib",
+    }
+
+def test_unset_options_keep_defaults(monkeypatch):
+    for variable in ["MONGO_MAX_POOL_SIZE", "MONGO_MIN_POOL_SIZE", "MONGO_SERVER_SELECTION_TIMEOUT_MS", "MONGO_COMPRESSORS"]:
+        monkeypatch.delenv(variable, raising=False)
+    assert "maxPoolSize" not in mongo_client_options()
@@ -0,0 +1,44 @@
+# Written by Colby
+# Tests for the MongoDB command and pool listeners, fed with synthetic monitoring events
+
+from datetime import timedelta
+from pymongo import monitoring
+from metrics import registry, start_request, finish_request, server_timing_header
+from mongo_monitoring import CommandMonitor, PoolMonitor, query_shape
+
+ADDRESS = ("localhost", 27017)
+
+def run_find(monitor, request_id, milliseconds, documents):
+    command = {"find": "2025_Spring", "filter": {"building": "ECSS", "room": {"$in": ["2.101", "2.102"]}}}
+    monitor.started(monitoring.CommandStartedEvent(command, "database", request_id, ADDRESS, request_id))
+    reply = {"ok": 1, "cursor": {"id": 0, "ns": "database.2025_Spring", "firstBatch": [{"room": "2.101"}] * documents}}
+    monitor.succeeded(monitoring.CommandSucceededEvent(timedelta(milliseconds=milliseconds), reply, "find", request_id, ADDRESS, request_id))
+
+def test_query_shape():
+    assert query_shape({"building": "ECSS", "room": {"$in": ["2.101", "2.102"]}, "$or": [{"a": 1}, {"b": 2}]}) == \
+        {"building": "?", "room": {"$in": "?"}, "$or": [{"a": "?"}, {"b": "?"}]}
+
+def test_commands_are_counted_and_slow_ones_logged(capsys):
+    monitor = CommandMonitor(slow_query_ms=50)
+    start_request()
+    run_find(monitor, 1, 5, 2)
+    run_find(monitor, 2, 80, 3)
+    timings = finish_request()
+
+    assert timings["mongo"][0] == 2
+    log = capsys.readouterr().out
+    assert log.count("Slow MongoDB find") == 1
+    assert '3 documents' in log and ' bytes' in log
+    assert '{"building": "?", "room": {"$in": "?"}}' in log
+
+    text = registry.render()
+    assert 'roomfinder_mongo_commands_total{collection="2025_Spring",command="find"}' in text
+    assert 'roomfinder_mongo_documents_returned_count{collection="2025_Spring",command="find"}' in text
+
+def test_pool_wait_is_part_of_the_request_breakdown():
+    start_request()
+    PoolMonitor().connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, 0.02))
+    timings = finish_request()
+    assert timings["mongo_pool_wait"] == [1, 0.02]
+    # Time inside database calls isn't subtracted from the app's share twice
+    assert "app;dur=80.00" in server_timing_header(dict(timings, db=[1, 0.02]), 0.1)
@@ -0,0 +1,97 @@
+# Written by Colby
+# Tests that the occupancy bitmap engine agrees with the schedule sweep
+
+import random
+import pytest
+from mock_db import MockDatabase
+from occupancy import OccupancyIndex, ROW_BYTES
+from util import to_time_str, make_event
+
+DATE = "2025-04-14"
+SEARCHES = [
+    (None, None, "00:00", "23:59", 1),
+    (None, None, "08:00", "18:00", 60),
+    ("ECSS", None, "09:00", "12:00", 15),
+    (None, None, "10:00", "10:30", 45),
+    ("JSOM", "1.005", "13:00", "17:00", 30),
+]
+
+def random_rooms(num_rooms, seed=0):
+    """Create rooms with random, possibly overlapping and cancelled, events on DATE."""
+    rng = random.Random(seed)
+    rooms = []
+    for i in range(num_rooms):
+        events = []
+        for _ in range(rng.randint(0, 6)):
+            start = rng.randrange(7 * 60, 21 * 60, 15)
+            end = min(start + rng.choice([50, 75, 90, 120, 180]), 23 * 60 + 59)
+            status = rng.choice(["Scheduled", "Scheduled", "User Reported", "Cancelled"])
+            events.append(make_event(to_time_str(start), to_time_str(end), status))
+        rooms.append({"building": rng.choice(["ECSS", "JSOM", "GR"]), "room": f"1.{i:03d}", "schedule": {DATE: events}})
+    return rooms
+
+@pytest.fixture()
+def databases():
+    bitmap_db = MockDatabase(availability_engine="bitmap")
+    sweep_db = MockDatabase(availability_engine="sweep")
+    rooms = random_rooms(200)
+    bitmap_db.rooms = rooms
+    sweep_db.rooms = rooms
+    return bitmap_db, sweep_db
+
+@pytest.mark.parametrize("building, room, start_time, end_time, min_duration", SEARCHES)
+def test_engines_agree(databases, building, room, start_time, end_time, min_duration):
+    bitmap_db, sweep_db = databases
+    args = (building, room, DATE, start_time, end_time, min_duration)
+    assert bitmap_db.get_rooms_with_next_availability(*args, limit=500) == sweep_db.get_rooms_with_next_availability(*args, limit=500)
+    assert bitmap_db.get_rooms_with_sufficient_gap(*args, limit=20) == sweep_db.get_rooms_with_sufficient_gap(*args, limit=20)
+    for room_data in bitmap_db.rooms[:20]:
+        single = (room_data['building'], room_data['room'], DATE, start_time, end_time, min_duration)
+        assert bitmap_db.get_next_availability_on_date(*single) == sweep_db.get_next_availability_on_date(*single)
+
+def test_incremental_updates(databases):
+    bitmap_db, sweep_db = databases
+    room_data = bitmap_db.rooms[0]
+    building, room = room_data['building'], room_data['room']
+    # Warm the day array before changing the schedule
+    bitmap_db.get_rooms_with_next_availability(None, None, DATE, "00:00", "23:59", 1)
+
+    assert bitmap_db.add_event(building, room, DATE, "00:00", "06:00", "Early") is True
+    assert bitmap_db.get_next_availability_on_date(building, room, DATE, "00:00", "07:00", 30) == \
+        sweep_db.get_next_availability_on_date(building, room, DATE, "00:00", "07:00", 30)
+    assert bitmap_db.get_next_availability_on_date(building, room, DATE, "00:00", "06:00", 1) is None
+
+    assert bitmap_db.remove_user_event(building, room, DATE, "00:00", "06:00") is True
+    assert bitmap_db.get_next_availability_on_date(building, room, DATE, "00:00", "06:00", 1) == "00:00 - 06:00"
+
+    bitmap_db.add_event(building, room, DATE, "00:00", "06:00", "Early", status="Scheduled")
+    assert bitmap_db.cancel_event(building, room, DATE, "00:00", "06:00") is True
+    assert bitmap_db.get_next_availability_on_date(building, room, DATE, "00:00", "06:00", 1) == "00:00 - 06:00"
+    assert bitmap_db.uncancel_event(building, room, DATE, "00:00", "06:00") is True
+    assert bitmap_db.get_next_availability_on_date(building, room, DATE, "00:00", "06:00", 1) is None
+
+def test_rooms_created_after_search(databases):
+    bitmap_db, sweep_db = databases
+    bitmap_db.get_rooms_with_next_availability(None, None, DATE, "00:00", "23:59", 1)
+
+    bitmap_db.add_room("NEW", "1.001", {DATE: [
+        {"start_time": "08:00", "end_time": "12:00", "status": "Scheduled", "event_title": "", "notes": ""}
+    ]})
+    assert bitmap_db.get_room("NEW", "1.001") is not None
+    assert bitmap_db.get_buildings() == sorted({r['building'] for r in bitmap_db.rooms})
+    results = bitmap_db.get_rooms_with_next_availability("NEW", None, DATE, "07:00", "18:00", 60)
+    assert results == [{"building": "NEW", "room": "1.001", "location": None, "next_availability": (420, 480)}]
+
+def test_days_are_packed_and_evicted():
+    rooms = random_rooms(50)
+    for room_data in rooms:
+        room_data['schedule']["2025-04-15"] = room_data['schedule'][DATE]
+    index = OccupancyIndex(rooms, max_days=1)
+    assert index.day(DATE).shape == (50, ROW_BYTES)
+
+    # Searching another date drops the least recently used one, and searching it again rebuilds it
+    expected = index.first_slots(DATE, 8 * 60, 18 * 60, 60)
+    index.first_slots("2025-04-15", 8 * 60, 18 * 60, 60)
+    assert list(index.days) == ["2025-04-15"]
+    for found, rebuilt in zip(expected, index.first_slots(DATE, 8 * 60, 18 * 60, 60)):
+        assert (found == rebuilt).all()
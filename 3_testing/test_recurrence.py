@@ -0,0 +1,63 @@
+# Written by Colby
+# Tests for storing schedules as weekly recurrence rules with per-date overrides
+
+import copy
+import pytest
+from mock_db import MockDatabase
+from recurrence import SemesterCalendar, to_recurring, expand_schedule
+from util import make_event
+
+CALENDAR = SemesterCalendar("2025-04-07", "2025-04-27", holidays=["2025-04-16"])
+WEEKLY = {
+    0: [make_event("09:00", "10:15", "Scheduled", "CS 1337"), make_event("13:00", "14:15", "Scheduled", "MATH 2418")],
+    2: [make_event("09:00", "10:15", "Scheduled", "CS 1337")],
+    4: [make_event("11:00", "12:00", "Scheduled", "ECS 1100")],
+}
+
+def dated_rooms():
+    """Rooms with the same weekly classes on every class day, plus a one-off report and a cancellation."""
+    rooms = []
+    for i in range(3):
+        schedule = {}
+        for date in CALENDAR.class_days():
+            events = WEEKLY.get(int(date[-2:]) % 7, [])  # 2025-04-07 is a Monday
+            if events:
+                schedule[date] = copy.deepcopy(events)
+        rooms.append({"building": "ECSS", "room": f"2.{i:03d}", "schedule": schedule})
+    rooms[0]['schedule']["2025-04-11"].append(make_event("15:00", "16:00", "User Reported", "Study group"))
+    rooms[1]['schedule']["2025-04-14"][0]['status'] = "Cancelled"
+    return rooms
+
+@pytest.fixture()
+def databases():
+    dated_db = MockDatabase()
+    recurring_db = MockDatabase()
+    recurring_db.calendar = CALENDAR
+    rooms = dated_rooms()
+    dated_db.rooms = rooms
+    recurring_db.rooms = [to_recurring(room_data, CALENDAR) for room_data in copy.deepcopy(rooms)]
+    return dated_db, recurring_db
+
+def test_round_trip():
+    for room_data in dated_rooms():
+        converted = to_recurring(room_data, CALENDAR)
+        assert expand_schedule(converted, CALENDAR) == room_data['schedule']
+    # Only the dates that differ from their weekday's rule are stored
+    assert len(to_recurring(dated_rooms()[0], CALENDAR)['overrides']) == 1
+
+def test_layouts_agree(databases):
+    dated_db, recurring_db = databases
+    for date in ["2025-04-07", "2025-04-09", "2025-04-14", "2025-04-16", "2025-04-25", "2025-04-26"]:
+        args = (None, None, date, "08:00", "18:00", 60)
+        assert recurring_db.get_rooms_with_next_availability(*args, limit=10) == dated_db.get_rooms_with_next_availability(*args, limit=10)
+        assert recurring_db.find_available_slots("ECSS", "2.001", date) == dated_db.find_available_slots("ECSS", "2.001", date)
+    assert recurring_db.get_room("ECSS", "2.000") == dated_db.get_room("ECSS", "2.000")
+
+def test_writes_only_change_one_date(databases):
+    dated_db, recurring_db = databases
+    for db in databases:
+        assert db.cancel_event("ECSS", "2.002", "2025-04-07", "09:00", "10:15", "Sick") is True
+        assert db.add_event("ECSS", "2.002", "2025-04-16", "10:00", "11:00", "Review") is True
+    assert recurring_db.get_room("ECSS", "2.002") == dated_db.get_room("ECSS", "2.002")
+    # The following Monday still follows the rule
+    assert recurring_db.get_next_availability_on_date("ECSS", "2.002", "2025-04-14", "09:00", "12:00", 30) == "10:15 - 12:00"
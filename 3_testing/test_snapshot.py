@@ -0,0 +1,114 @@
+# Written by Colby
+# Tests for the memory-mapped availability snapshot shared by worker processes
+
+import threading
+import time
+import pytest
+from mongodb import MongoDatabase
+from occupancy import OccupancyIndex
+from snapshot import AvailabilitySnapshot, write_snapshot, open_or_build
+from util import make_event
+from test_occupancy import random_rooms, DATE
+
+@pytest.fixture()
+def rooms():
+    return random_rooms(200)
+
+@pytest.fixture()
+def snapshot_path(tmp_path, rooms):
+    path = str(tmp_path / "availability.snapshot")
+    write_snapshot(path, rooms)
+    return path
+
+@pytest.mark.parametrize("building, room, start_minutes, end_minutes, min_duration", [
+    (None, None, 0, 1439, 1),
+    (None, None, 480, 1080, 60),
+    ("ECSS", None, 540, 720, 15),
+    ("JSOM", "1.005", 780, 1020, 30),
+])
+def test_snapshot_agrees_with_occupancy_index(rooms, snapshot_path, building, room, start_minutes, end_minutes, min_duration):
+    index = OccupancyIndex(rooms)
+    snapshot = AvailabilitySnapshot(snapshot_path)
+    expected = index.first_slots(DATE, start_minutes, end_minutes, min_duration, index.rows_matching(building, room), limit=50)
+    found = snapshot.first_slots(DATE, start_minutes, end_minutes, min_duration, snapshot.rows_matching(building, room), limit=50)
+    for expected_array, found_array in zip(expected, found):
+        assert expected_array.tolist() == found_array.tolist()
+
+def test_written_rows_are_seen_by_every_mapping(snapshot_path):
+    """Test that a row written by one worker is visible to another worker's mapping of the same file"""
+    writer, reader = AvailabilitySnapshot(snapshot_path), AvailabilitySnapshot(snapshot_path)
+    building, room = writer.rooms[0]['building'], writer.rooms[0]['room']
+
+    assert writer.write_room(building, room, DATE, [make_event("00:00", "23:59", "User Reported")])
+    rows, _, _ = reader.first_slots(DATE, 0, 1439, 1, reader.rows_matching(building, room))
+    assert not len(rows)
+
+    assert not writer.write_room(building, room, "2030-01-01", []) # dates outside the snapshot are left alone
+
+def test_new_generation_is_picked_up(rooms, snapshot_path):
+    """Test that workers switch to a replaced snapshot file"""
+    snapshot = AvailabilitySnapshot(snapshot_path, check_interval=0)
+    assert snapshot.generation == 1
+    write_snapshot(snapshot_path, rooms[:10])
+
+    refreshed = snapshot.refreshed()
+    assert refreshed is not snapshot
+    assert refreshed.generation == 2
+    assert len(refreshed.rooms) == 10
+    assert refreshed.refreshed() is refreshed
+
+def test_writes_wait_for_a_build(rooms, snapshot_path):
+    """Test that a row written while a new generation is built goes to the new file instead of the replaced one"""
+    snapshot = AvailabilitySnapshot(snapshot_path)
+    building, room = snapshot.rooms[0]['building'], snapshot.rooms[0]['room']
+    written = []
+    writer = threading.Thread(target=lambda: written.append(
+        snapshot.write_room(building, room, DATE, [make_event("00:00", "23:59", "User Reported")])))
+
+    def build():
+        writer.start()
+        time.sleep(0.2)
+        assert not written # the write waits for the build
+        write_snapshot(snapshot_path, rooms)
+
+    open_or_build(snapshot_path, build, lambda snapshot: False).close()
+    writer.join()
+    assert written == [False] # the file was replaced
+
+    newer = snapshot.refreshed(force=True)
+    assert newer is not snapshot and newer.generation == 2
+    assert newer.write_room(building, room, DATE, [make_event("00:00", "23:59", "User Reported")])
+
+def test_open_or_build_only_builds_when_needed(rooms, tmp_path):
+    path = str(tmp_path / "availability.snapshot")
+    builds = []
+    def build():
+        builds.append(write_snapshot(path, rooms, sources={"2025_Spring": "2025_Spring"}))
+
+    open_or_build(path, build)
+    snapshot = open_or_build(path, build, is_current=lambda snapshot: snapshot.sources == {"2025_Spring": "2025_Spring"})
+    assert builds == [1]
+    assert snapshot.generation == 1
+
+def test_new_rooms_rebuild_in_background(rooms, tmp_path):
+    """Test that rooms created by reports rebuild the snapshot off the request, once per batch of new rooms"""
+    database = MongoDatabase()
+    database.snapshot_path = str(tmp_path / "availability.snapshot")
+    started, release = threading.Event(), threading.Event()
+    builds = []
+    def rebuild():
+        started.set()
+        release.wait(5)
+        builds.append(write_snapshot(database.snapshot_path, rooms))
+    database.rebuild_snapshot = rebuild
+
+    database._request_snapshot_rebuild() # returns without waiting for the rebuild
+    assert started.wait(5)
+    database._request_snapshot_rebuild()
+    database._request_snapshot_rebuild()
+    release.set()
+    deadline = time.monotonic() + 5
+    while database._snapshot_rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert builds == [1, 2] # the two rooms created during the first rebuild share the second
+    assert database.snapshot.generation == 2
@@ -0,0 +1,47 @@
+# Written by Colby
+# Tests for the embedded SQLite database, reusing the database tests that only go through the interface
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sqlite_db import SQLiteDatabase
+from test_db import (
+    SAMPLE_ROOM_1, SAMPLE_ROOM_2, SAMPLE_ROOM_3,
+    test_get_room_found, test_get_room_not_found, test_get_buildings, test_get_rooms_by_building,
+    test_add_event_success_existing_room, test_add_event_overlap, test_add_event_overlap_with_cancelled, test_add_event_invalid_time,
+    test_remove_user_event_success, test_remove_user_event_not_found, test_remove_user_event_wrong_status,
+    test_cancel_event_success, test_cancel_event_not_found, test_cancel_event_wrong_status,
+    test_uncancel_event_success, test_uncancel_event_not_found, test_uncancel_event_wrong_status,
+    test_get_next_availability_found, test_get_next_availability_not_found,
+    test_get_next_availability_empty_room, test_get_next_availability_no_schedule_for_date,
+    test_get_rooms_with_sufficient_gap_found, test_get_rooms_with_sufficient_gap_not_found,
+    test_get_rooms_with_sufficient_gap_limit, test_get_rooms_with_next_availability,
+)
+
+@pytest.fixture
+def test_db(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "roomfinder.db"))
+    assert database.initialize_db()
+    database.load_rooms([SAMPLE_ROOM_1, SAMPLE_ROOM_2, SAMPLE_ROOM_3])
+    yield database
+    database.close()
+
+def test_load_rooms_stores_minutes(test_db):
+    """Test that loaded events get their parsed start and end minutes"""
+    event = test_db.get_room("ECSS", "2.101")["schedule"]["2025-09-01"][0]
+    assert (event["start_min"], event["end_min"]) == (540, 630)
+    assert test_db.get_date_range() == ("2025-09-01", "2025-09-02")
+
+def test_add_event_creates_room(test_db):
+    """Test that reporting an event in an unknown room creates the room"""
+    generation = test_db.catalog_generation
+    assert test_db.add_event("GR", "2.201", "2025-09-01", "12:00", "13:00") is True
+    assert test_db.get_rooms_by_building()["GR"] == ["2.201"]
+    assert test_db.catalog_generation == generation + 1
+
+def test_add_event_concurrent_overlap(test_db):
+    """Test that only one of several concurrent overlapping reports is stored"""
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: test_db.add_event("GR", "2.201", "2025-09-01", "12:00", "13:00"), range(4)))
+    assert results.count(True) == 1
+    assert results.count("Event overlaps with an existing event") == 3
+    assert len(test_db.get_room("GR", "2.201")["schedule"]["2025-09-01"]) == 1
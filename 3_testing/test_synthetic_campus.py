@@ -0,0 +1,24 @@
+# Written by Colby
+# Tests for the synthetic campus generator used by the benchmarks
+
+from synthetic_campus import generate_campus
+from util import event_minutes
+
+def test_campus_is_seeded():
+    rooms, _ = generate_campus(50, weeks=2, seed=1)
+    assert rooms == generate_campus(50, weeks=2, seed=1)[0]
+    assert rooms != generate_campus(50, weeks=2, seed=2)[0]
+
+def test_campus_follows_the_semester_calendars():
+    rooms, calendars = generate_campus(250, num_semesters=2, weeks=6)
+    assert len(rooms) == 250
+    assert len({(room_data['building'], room_data['room']) for room_data in rooms}) == 250
+    assert len({room_data['building'] for room_data in rooms}) == 3
+
+    class_days = set(calendars[0].class_days()) | set(calendars[1].class_days())
+    for room_data in rooms:
+        assert set(room_data['schedule']) <= class_days
+        for events in room_data['schedule'].values():
+            # A room's classes never overlap
+            times = [event_minutes(event) for event in events]
+            assert all(previous[1] <= following[0] for previous, following in zip(times, times[1:]))
@@ -0,0 +1,88 @@
+# Written by Colby
+# Tests for parsing and merging the CourseBook spreadsheets in upload.py
+
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '2_data_collection')))
+import upload  # noqa: E402
+from upload import parse_workbook, parse_workbooks, merge_weekday_maps, ParsedWorkbookCache, file_hash  # noqa: E402
+
+def write_workbook(filepath, sections):
+    """Write a CourseBook-style export (two title rows, then the column names) of (location, days, times) sections."""
+    with pd.ExcelWriter(filepath) as writer:
+        pd.DataFrame([["CourseBook v11 Export"], ["test"]]).to_excel(writer, index=False, header=False)
+        pd.DataFrame(sections, columns=["location", "days", "times"]).to_excel(writer, index=False, startrow=2)
+
+def write_workbooks(directory):
+    """Write three workbooks that share some rooms and class times."""
+    workbooks = [
+        [("ECSS_2.101", "Monday, Wednesday", "10:00 - 11:15"), ("JSOM_1.101", "Friday", "09:00 - 11:45"),
+         ("ONLINE", "Tuesday", "10:00 - 11:15")],
+        [("ECSS_2.101", "Monday", "10:00 - 11:15"), ("ECSS_2.101", "Monday", "13:00 - 14:15"),
+         ("SCI_1.210", "Tuesday, Thursday", "08:30 - 09:45")],
+        [("JSOM_1.101", "Friday", "13:00 - 15:45"), ("SCI_1.210", "Thursday", "08:30 - 09:45")],
+    ]
+    filepaths = []
+    for i, sections in enumerate(workbooks):
+        filepath = os.path.join(directory, f"catalog{i}.xlsx")
+        write_workbook(filepath, sections)
+        filepaths.append(filepath)
+    return filepaths
+
+def test_rooms_merged_across_workbooks(tmp_path):
+    """Test that a room appearing in several workbooks gets the union of its class times without duplicates"""
+    merged = parse_workbooks(write_workbooks(tmp_path), workers=1)
+    assert merged == {
+        "ECSS_2.101": [["10:00 - 11:15", "13:00 - 14:15"], [], ["10:00 - 11:15"], [], [], []],
+        "JSOM_1.101": [[], [], [], [], ["09:00 - 11:45", "13:00 - 15:45"], []],
+        "SCI_1.210": [[], ["08:30 - 09:45"], [], ["08:30 - 09:45"], [], []],
+    }
+
+def test_parallel_parse_matches_serial(tmp_path):
+    """Test that parsing in worker processes gives the same result as parsing serially"""
+    filepaths = write_workbooks(tmp_path)
+    serial = merge_weekday_maps(parse_workbook(filepath) for filepath in filepaths)
+    assert parse_workbooks(filepaths, workers=2) == serial
+    assert parse_workbooks(filepaths, workers=1) == serial
+
+def test_cache_hit_and_miss(tmp_path):
+    """Test that unchanged workbooks are loaded from the cache and changed ones are parsed again"""
+    filepaths = write_workbooks(tmp_path)
+    cache = ParsedWorkbookCache(str(tmp_path / "cache"))
+    expected = parse_workbooks(filepaths, workers=1, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    cache = ParsedWorkbookCache(str(tmp_path / "cache"))
+    assert parse_workbooks(filepaths, workers=1, cache=cache) == expected
+    assert (cache.hits, cache.misses) == (3, 0)
+
+    write_workbook(filepaths[2], [("GR_3.301", "Monday", "16:00 - 17:15")])
+    cache = ParsedWorkbookCache(str(tmp_path / "cache"))
+    merged = parse_workbooks(filepaths, workers=1, cache=cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert merged["GR_3.301"][0] == ["16:00 - 17:15"]
+    assert merged["JSOM_1.101"][4] == ["09:00 - 11:45"]
+
+def test_cache_version_invalidates_entries(tmp_path, monkeypatch):
+    """Test that entries written under another CACHE_VERSION are ignored"""
+    filepath = write_workbooks(tmp_path)[0]
+    cache = ParsedWorkbookCache(str(tmp_path / "cache"))
+    cache.put(file_hash(filepath), parse_workbook(filepath))
+    assert cache.get(file_hash(filepath)) is not None
+
+    monkeypatch.setattr(upload, "CACHE_VERSION", upload.CACHE_VERSION + 1)
+    assert cache.get(file_hash(filepath)) is None
+    assert cache.misses == 1
+
+def test_rebuild_cache(tmp_path):
+    """Test that --rebuild-cache (rebuild=True) parses every workbook again and overwrites its entry"""
+    filepath = write_workbooks(tmp_path)[0]
+    digest = file_hash(filepath)
+    ParsedWorkbookCache(str(tmp_path / "cache")).put(digest, {"STALE_1.001": [[] for _ in range(6)]})
+
+    cache = ParsedWorkbookCache(str(tmp_path / "cache"), rebuild=True)
+    assert parse_workbooks([filepath], workers=1, cache=cache) == parse_workbook(filepath)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert ParsedWorkbookCache(str(tmp_path / "cache")).get(digest) == parse_workbook(filepath)